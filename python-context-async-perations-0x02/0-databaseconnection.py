@@ -3,21 +3,154 @@
 DatabaseConnection context manager implementation
 """
 
+import queue
 import sqlite3
+import threading
+
+# Per-connection tuning only: pooled connections behave like plain ones
+DEFAULT_PRAGMAS = {
+    "cache_size": -16000,
+    "temp_store": "MEMORY",
+}
+
+# Opt in with pragmas={**DEFAULT_PRAGMAS, **WAL_PRAGMAS}; WAL stays on the
+# database file. Add "foreign_keys": "ON" to enforce foreign keys.
+WAL_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+}
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections to one database file.
+
+    Connections are opened on demand up to max_size, initialized with
+    PRAGMAs once (DEFAULT_PRAGMAS unless pragmas is given), and reused.
+    When all of them are checked out, acquire() waits up to timeout
+    seconds and then raises TimeoutError.
+    """
+
+    def __init__(self, db_name, max_size=5, timeout=30.0, pragmas=None):
+        """Initialize an empty pool for db_name."""
+        self.db_name = db_name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self.checkouts = 0
+        self.connects = 0
+
+    def _connect(self):
+        """Open and initialize a new connection."""
+        conn = sqlite3.connect(self.db_name, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        self.connects += 1
+        return conn
+
+    def acquire(self):
+        """Check out a connection, opening one if the pool is not full."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                grow = self._open < self.max_size
+                if grow:
+                    self._open += 1
+            if grow:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            else:
+                try:
+                    conn = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise TimeoutError(
+                        f"No connection to {self.db_name} free within "
+                        f"{self.timeout}s") from None
+        with self._lock:
+            self.checkouts += 1
+        return conn
+
+    def release(self, conn):
+        """Return a connection; anything left uncommitted is rolled back."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+            with self._lock:
+                self._open -= 1
+            return
+        self._idle.put(conn)
+
+    def close(self):
+        """Close the idle connections."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._open -= 1
+
+    def stats(self):
+        """Open/idle connection counts and checkout counters."""
+        return {"open": self._open, "idle": self._idle.qsize(),
+                "checkouts": self.checkouts, "connects": self.connects}
+
+
+#### one pool per db_name, created on first use
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_name, max_size=5, timeout=30.0, pragmas=None):
+    """Shared pool for db_name; options only apply when it is created."""
+    with _pools_lock:
+        pool = _pools.get(db_name)
+        if pool is None:
+            pool = _pools[db_name] = ConnectionPool(
+                db_name, max_size=max_size, timeout=timeout, pragmas=pragmas)
+        return pool
 
 
 class DatabaseConnection:
-    """Context manager to handle SQLite database connections."""
+    """
+    Context manager to handle SQLite database connections.
+
+    With pooled=True the connection is checked out of the shared pool for
+    db_name (see get_pool) and returned to it on exit instead of being
+    closed, so short with blocks skip the connection setup.
+    """
 
-    def __init__(self, db_name):
-        """Initialize with database name."""
+    def __init__(self, db_name, pooled=False, max_size=5, timeout=30.0,
+                 pragmas=None):
+        """Initialize with database name and optional pool settings."""
         self.db_name = db_name
+        self.pooled = pooled
+        self.max_size = max_size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self.pool = None
         self.conn = None
         self.cursor = None
 
     def __enter__(self):
-        """Open the database connection and return the cursor."""
-        self.conn = sqlite3.connect(self.db_name)
+        """Open (or check out) the database connection and return the cursor."""
+        if self.pooled:
+            self.pool = get_pool(self.db_name, max_size=self.max_size,
+                                 timeout=self.timeout, pragmas=self.pragmas)
+            self.conn = self.pool.acquire()
+        else:
+            self.conn = sqlite3.connect(self.db_name)
         self.cursor = self.conn.cursor()
         return self.cursor
 
@@ -26,13 +159,19 @@ class DatabaseConnection:
         Handle closing connection:
         - Commit if no exception
         - Rollback if exception
+        - Return a pooled connection to its pool instead of closing it
         """
-        if exc_type is None:
-            self.conn.commit()
-        else:
-            self.conn.rollback()
-        self.cursor.close()
-        self.conn.close()
+        try:
+            if exc_type is None:
+                self.conn.commit()
+            else:
+                self.conn.rollback()
+            self.cursor.close()
+        finally:
+            if self.pool is not None:
+                self.pool.release(self.conn)
+            else:
+                self.conn.close()
 
 
 # if __name__ == "__main__":
@@ -4,25 +4,101 @@ ExecuteQuery context manager implementation
 """
 
 import sqlite3
+from collections import namedtuple
+
+
+def tuple_row_factory():
+    """Rows as plain tuples (sqlite3's default)."""
+    return None
+
+
+def namedtuple_row_factory():
+    """Rows as namedtuples; the class is built once from the first row."""
+    row_class = None
+
+    def factory(cursor, row):
+        nonlocal row_class
+        if row_class is None:
+            row_class = namedtuple(
+                "Row", [column[0] for column in cursor.description], rename=True)
+        return row_class(*row)
+    return factory
+
+
+def dict_row_factory():
+    """Rows as dicts keyed by column name."""
+    names = None
+
+    def factory(cursor, row):
+        nonlocal names
+        if names is None:
+            names = [column[0] for column in cursor.description]
+        return dict(zip(names, row))
+    return factory
+
+
+ROW_FACTORIES = {
+    "tuple": tuple_row_factory,
+    "namedtuple": namedtuple_row_factory,
+    "dict": dict_row_factory,
+}
 
 
 class ExecuteQuery:
-    """Context manager to execute a SQL query safely."""
+    """
+    Context manager to execute a SQL query safely.
+
+    By default the with block gets the full result list (fetchall). With
+    stream=True it gets a lazy iterator over the open cursor instead, so
+    rows are read from the database as the block consumes them; with
+    batch_size as well it yields lists of up to batch_size rows
+    (fetchmany). The iterator is only valid inside the with block.
 
-    def __init__(self, db_name, query, params=None):
+    row_factory: "tuple" (default), "namedtuple", "dict" or a
+    sqlite3-style callable(cursor, row).
+    """
+
+    def __init__(self, db_name, query, params=None, stream=False,
+                 batch_size=None, row_factory=None):
         self.db_name = db_name
         self.query = query
         self.params = params if params else []
+        self.stream = stream
+        self.batch_size = batch_size
+        self.row_factory = row_factory
         self.conn = None
         self.cursor = None
         self.results = None
 
+    def _make_row_factory(self):
+        if self.row_factory is None or callable(self.row_factory):
+            return self.row_factory
+        try:
+            return ROW_FACTORIES[self.row_factory]()
+        except KeyError:
+            raise ValueError(f"Unknown row_factory: {self.row_factory}") from None
+
+    def _batches(self):
+        """Yield lists of up to batch_size rows until the cursor is drained."""
+        while True:
+            rows = self.cursor.fetchmany(self.batch_size)
+            if not rows:
+                return
+            yield rows
+
     def __enter__(self):
-        """Open connection, execute query, and return results."""
+        """Open connection, execute query, and return results (or a row iterator)."""
+        row_factory = self._make_row_factory()
         self.conn = sqlite3.connect(self.db_name)
+        self.conn.row_factory = row_factory
         self.cursor = self.conn.cursor()
 
         self.cursor.execute(self.query, self.params)
+        if self.stream:
+            if self.batch_size:
+                self.cursor.arraysize = self.batch_size
+                return self._batches()
+            return iter(self.cursor)
         self.results = self.cursor.fetchall()
         return self.results
 
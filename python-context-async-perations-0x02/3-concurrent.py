@@ -4,20 +4,102 @@ Run multiple database queries concurrently using asyncio and aiosqlite
 """
 
 import asyncio
-import aiosqlite
+import time
+from collections import namedtuple
 
+from async_pool import close_pools, get_pool
 
-async def async_fetch_users(db_name: str = "example.db"):
-    """Fetch all users from the users table asynchronously."""
-    async with aiosqlite.connect(db_name) as db:
+QueryResult = namedtuple("QueryResult", "index query params rows error elapsed")
+
+
+async def _run_query(pool, query, params, timeout):
+    """Run one query on a pooled connection, interrupting it on timeout."""
+    async with pool.connection() as db:
+        try:
+            return await asyncio.wait_for(db.execute_fetchall(query, params),
+                                          timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            await db.interrupt()  # stop the statement still running in sqlite
+            raise
+
+
+async def fan_out(queries, db_name="example.db", limit=8, timeout=None,
+                  pool=None):
+    """
+    Run parameterized queries concurrently and yield a QueryResult for each
+    as soon as it completes (not in input order).
+
+    - queries: iterable of SQL strings or (query, params) pairs, read lazily
+    - limit: at most this many queries in flight at once
+    - timeout: per-query seconds; a query that takes longer is interrupted
+      and yields a result whose error is a TimeoutError
+    - pool: AsyncConnectionPool (default: the shared pool for db_name)
+
+    A failing query yields its exception as `error` instead of stopping the
+    others. Leaving the loop early (break, cancellation) cancels whatever
+    is still running.
+    """
+    pool = pool or get_pool(db_name, size=limit)
+    pending = {}
+    items = enumerate(queries)
+
+    def start_next():
+        item = next(items, None)
+        if item is None:
+            return False
+        index, entry = item
+        query, params = (entry, ()) if isinstance(entry, str) else entry
+        task = asyncio.ensure_future(_run_query(pool, query, params, timeout))
+        pending[task] = (index, query, params, time.perf_counter())
+        return True
+
+    try:
+        while len(pending) < limit and start_next():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                index, query, params, started = pending.pop(task)
+                elapsed = time.perf_counter() - started
+                error = task.exception()
+                if isinstance(error, asyncio.TimeoutError):
+                    error = TimeoutError(f"Query {index} exceeded {timeout}s")
+                rows = None if error else task.result()
+                start_next()
+                yield QueryResult(index, query, params, rows, error, elapsed)
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def fetch_all(queries, **options):
+    """Run fan_out to completion; results (or errors) in input order."""
+    results = {}
+    async for result in fan_out(queries, **options):
+        results[result.index] = result.error or result.rows
+    return [results[index] for index in sorted(results)]
+
+
+async def async_fetch_users(db_name: str = "example.db", executor=None):
+    """
+    Fetch all users from the users table asynchronously. With a
+    ReplicaExecutor the read runs on one of its read-only connections.
+    """
+    if executor is not None:
+        return await executor.read("SELECT * FROM users")
+    async with get_pool(db_name).connection() as db:
         async with db.execute("SELECT * FROM users") as cursor:
             rows = await cursor.fetchall()
             return rows
 
 
-async def async_fetch_older_users(db_name: str = "example.db"):
+async def async_fetch_older_users(db_name: str = "example.db", executor=None):
     """Fetch users older than 40 from the users table asynchronously."""
-    async with aiosqlite.connect(db_name) as db:
+    if executor is not None:
+        return await executor.read("SELECT * FROM users WHERE age > ?", (40,))
+    async with get_pool(db_name).connection() as db:
         async with db.execute("SELECT * FROM users WHERE age > ?", (40,)) as cursor:
             rows = await cursor.fetchall()
             return rows
@@ -38,11 +120,8 @@ async def fetch_concurrently():
     for row in results_older:
         print(row)
 
+    await close_pools()
+
 
 if __name__ == "__main__":
     asyncio.run(fetch_concurrently())
-
-# ///tests
-
-async def async_fetch_users()
-async def async_fetch_older_users()
\ No newline at end of file
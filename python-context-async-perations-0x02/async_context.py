@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Async context managers for SQLite connections and queries
+"""
+
+import asyncio
+
+from async_pool import close_pools, get_pool
+
+ROW_FACTORIES = __import__('1-execute').ROW_FACTORIES
+
+
+class AsyncDatabaseConnection:
+    """
+    Async counterpart of DatabaseConnection: checks a connection out of
+    the shared aiosqlite pool for db_name and returns a cursor.
+    """
+
+    def __init__(self, db_name, pool=None):
+        """Initialize with database name (or an explicit AsyncConnectionPool)."""
+        self.db_name = db_name
+        self.pool = pool
+        self.conn = None
+        self.cursor = None
+
+    async def __aenter__(self):
+        """Check out a connection and return a cursor."""
+        self.pool = self.pool or get_pool(self.db_name)
+        self.conn = await self.pool.acquire()
+        try:
+            self.cursor = await self.conn.cursor()
+        except BaseException:
+            await self.pool.release(self.conn)
+            raise
+        return self.cursor
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """
+        Handle returning the connection:
+        - Commit if no exception
+        - Rollback if exception
+        """
+        try:
+            if exc_type is None:
+                await self.conn.commit()
+            else:
+                await self.conn.rollback()
+            await self.cursor.close()
+        finally:
+            await self.pool.release(self.conn)
+
+
+class AsyncExecuteQuery:
+    """
+    Async counterpart of ExecuteQuery on the shared aiosqlite pool.
+
+    By default the async with block gets the full result list. With
+    stream=True it gets an async iterator over the open cursor (rows are
+    fetched as the block consumes them); with batch_size as well it yields
+    lists of up to batch_size rows. The transaction is committed when the
+    block succeeds and rolled back when it raises.
+
+    row_factory: "tuple" (default), "namedtuple", "dict" or a
+    sqlite3-style callable(cursor, row).
+    """
+
+    def __init__(self, db_name, query, params=None, stream=False,
+                 batch_size=None, row_factory=None, pool=None):
+        self.db_name = db_name
+        self.query = query
+        self.params = params if params else []
+        self.stream = stream
+        self.batch_size = batch_size
+        self.row_factory = row_factory
+        self.pool = pool
+        self.conn = None
+        self.cursor = None
+        self.results = None
+
+    def _make_row_factory(self):
+        if self.row_factory is None or callable(self.row_factory):
+            return self.row_factory
+        try:
+            return ROW_FACTORIES[self.row_factory]()
+        except KeyError:
+            raise ValueError(f"Unknown row_factory: {self.row_factory}") from None
+
+    async def _batches(self):
+        """Yield lists of up to batch_size rows until the cursor is drained."""
+        while True:
+            rows = await self.cursor.fetchmany(self.batch_size)
+            if not rows:
+                return
+            yield rows
+
+    async def __aenter__(self):
+        """Check out a connection, execute query, and return results (or rows)."""
+        row_factory = self._make_row_factory()
+        self.pool = self.pool or get_pool(self.db_name)
+        self.conn = await self.pool.acquire()
+        try:
+            self.conn.row_factory = row_factory
+            self.cursor = await self.conn.execute(self.query, self.params)
+            if self.stream:
+                if self.batch_size:
+                    self.cursor.arraysize = self.batch_size
+                    return self._batches()
+                return self.cursor  # async for row in cursor
+            self.results = await self.cursor.fetchall()
+            return self.results
+        except BaseException:
+            await self._release()
+            raise
+
+    async def _release(self):
+        """Close the cursor and return the connection to the pool."""
+        try:
+            if self.cursor is not None:
+                await self.cursor.close()
+        finally:
+            self.cursor = None
+            self.conn.row_factory = None  # pooled connections are shared
+            await self.pool.release(self.conn)
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Commit or roll back, close the cursor and return the connection."""
+        try:
+            if exc_type is None:
+                await self.conn.commit()
+            else:
+                await self.conn.rollback()
+        finally:
+            await self._release()
+
+
+async def main():
+    """Stream users older than 25 as dicts."""
+    query = "SELECT * FROM users WHERE age > ?"
+    async with AsyncExecuteQuery("example.db", query, (25,), stream=True,
+                                 row_factory="dict") as rows:
+        async for row in rows:
+            print(row)
+    await close_pools()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
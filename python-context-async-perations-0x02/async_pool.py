@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Shared pool of aiosqlite connections
+"""
+
+import asyncio
+import weakref
+
+import aiosqlite
+
+DEFAULT_PRAGMAS = __import__('0-databaseconnection').DEFAULT_PRAGMAS
+
+
+class AsyncConnectionPool:
+    """
+    Bounded pool of aiosqlite connections to one database file.
+
+    Connections are opened on demand up to size and initialized with
+    PRAGMAs once. When all of them are checked out, acquire() waits up to
+    timeout seconds and then raises TimeoutError. A pool belongs to the
+    event loop that first uses it; call `await pool.close()` before the
+    loop ends.
+    """
+
+    def __init__(self, db_name, size=8, timeout=30.0, pragmas=None, uri=False):
+        """Initialize an empty pool for db_name (a file: URI if uri=True)."""
+        self.db_name = db_name
+        self.uri = uri
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self._idle = []
+        self._open = 0
+        self._cond = None
+        self.checkouts = 0
+        self.connects = 0
+
+    def _condition(self):
+        """Condition guarding the pool, created inside the running loop."""
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def _connect(self):
+        """Open and initialize a new connection."""
+        conn = await aiosqlite.connect(self.db_name, uri=self.uri)
+        for name, value in self.pragmas.items():
+            await conn.execute(f"PRAGMA {name} = {value}")
+        self.connects += 1
+        return conn
+
+    async def acquire(self):
+        """Check out a connection, opening one if the pool is not full."""
+        cond = self._condition()
+        async with cond:
+            try:
+                await asyncio.wait_for(
+                    cond.wait_for(lambda: self._idle or self._open < self.size),
+                    self.timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"No connection to {self.db_name} free within "
+                    f"{self.timeout}s") from None
+            self.checkouts += 1
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            return await self._connect()
+        except BaseException:
+            await self._discard()
+            raise
+
+    async def _discard(self):
+        """Forget one open connection and wake a waiter."""
+        cond = self._condition()
+        async with cond:
+            self._open -= 1
+            cond.notify()
+
+    async def release(self, conn):
+        """Return a connection; anything left uncommitted is rolled back."""
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+        except Exception:
+            await conn.close()
+            await self._discard()
+            return
+        cond = self._condition()
+        async with cond:
+            self._idle.append(conn)
+            cond.notify()
+
+    def connection(self):
+        """async with pool.connection() as conn: ..."""
+        return _Checkout(self)
+
+    async def close(self):
+        """Close the idle connections."""
+        cond = self._condition()
+        async with cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            await conn.close()
+
+    def stats(self):
+        """Open/idle connection counts and checkout counters."""
+        return {"open": self._open, "idle": len(self._idle),
+                "checkouts": self.checkouts, "connects": self.connects}
+
+
+class _Checkout:
+    """Async context manager around acquire()/release()."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    async def __aenter__(self):
+        self.conn = await self.pool.acquire()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.pool.release(self.conn)
+
+
+#### one pool per (event loop, db_name), created on first use
+_pools = weakref.WeakKeyDictionary()
+
+
+def get_pool(db_name, size=8, timeout=30.0, pragmas=None):
+    """Shared pool for db_name in the running loop; options apply on creation."""
+    pools = _pools.setdefault(asyncio.get_running_loop(), {})
+    pool = pools.get(db_name)
+    if pool is None:
+        pool = pools[db_name] = AsyncConnectionPool(
+            db_name, size=size, timeout=timeout, pragmas=pragmas)
+    return pool
+
+
+async def close_pools():
+    """Close every pool of the running loop."""
+    for pool in _pools.pop(asyncio.get_running_loop(), {}).values():
+        await pool.close()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark: query latency under concurrent tasks, sync ExecuteQuery pushed
+into threads (asyncio.to_thread) against AsyncExecuteQuery on the pool.
+
+Usage:
+    python3 bench_async_context.py [queries_per_task]
+
+For each concurrency level, that many tasks each run point lookups
+against a scratch example.db in a temporary directory.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from async_context import AsyncExecuteQuery
+from async_pool import AsyncConnectionPool
+from bench_execute_memory import make_db
+
+ExecuteQuery = __import__('1-execute').ExecuteQuery
+
+QUERY = "SELECT * FROM users WHERE id = ?"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def sync_lookup(path, user_id):
+    with ExecuteQuery(path, QUERY, (user_id,)) as results:
+        return results
+
+
+async def run(label, lookup, tasks, per_task):
+    """Run `tasks` tasks of `per_task` lookups; print latency percentiles."""
+    latencies = []
+
+    async def task(n):
+        for i in range(per_task):
+            start = time.perf_counter()
+            await lookup((n * per_task + i) % 10000 + 1)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(task(n) for n in range(tasks)))
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} tasks {tasks:>3} {len(latencies) / elapsed:>8.0f} q/sec "
+          f"p50 {percentile(latencies, 50) * 1000:>7.2f}ms "
+          f"p99 {percentile(latencies, 99) * 1000:>7.2f}ms")
+
+
+async def main(path, per_task):
+    for tasks in (1, 8, 32):
+        await run("to_thread", lambda user_id: asyncio.to_thread(
+            sync_lookup, path, user_id), tasks, per_task)
+
+        pool = AsyncConnectionPool(path, size=tasks)
+
+        async def async_lookup(user_id):
+            async with AsyncExecuteQuery(path, QUERY, (user_id,),
+                                         pool=pool) as results:
+                return results
+
+        await run("async", async_lookup, tasks, per_task)
+        await pool.close()
+
+
+if __name__ == "__main__":
+    per_task = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "example.db")
+        make_db(path, 10000)
+        asyncio.run(main(path, per_task))
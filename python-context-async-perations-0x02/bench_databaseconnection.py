@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark: short `with DatabaseConnection(...)` blocks per second, opening
+a connection each time against the pooled mode.
+
+Usage:
+    python3 bench_databaseconnection.py [blocks] [threads]
+
+Every block runs one primary-key lookup against a scratch example.db in
+a temporary directory, the way a request handler would.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from bench_execute_memory import make_db
+
+DatabaseConnection = __import__('0-databaseconnection').DatabaseConnection
+
+
+def run(label, path, blocks, threads, **options):
+    """Run blocks // threads lookups in each thread; print blocks/sec."""
+    per_thread = blocks // threads
+
+    def worker():
+        for i in range(per_thread):
+            with DatabaseConnection(path, **options) as cursor:
+                cursor.execute("SELECT * FROM users WHERE id = ?", (i % 1000 + 1,))
+                cursor.fetchone()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = per_thread * threads
+    print(f"{label:<10} {total:>7} blocks {elapsed:>7.3f}s "
+          f"{total / elapsed:>9.0f} blocks/sec")
+
+
+if __name__ == "__main__":
+    blocks = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "example.db")
+        make_db(path, 1000)
+        run("connect", path, blocks, threads)
+        run("pooled", path, blocks, threads, pooled=True, max_size=threads)
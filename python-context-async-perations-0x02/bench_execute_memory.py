@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: peak Python memory of ExecuteQuery with fetchall
+against the streaming modes.
+
+Usage:
+    python3 bench_execute_memory.py [rows]
+
+Builds a scratch example.db in a temporary directory with `rows` users,
+then runs "SELECT * FROM users WHERE age > ?" and walks every row,
+measuring the peak allocation with tracemalloc.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ExecuteQuery = __import__('1-execute').ExecuteQuery
+
+QUERY = "SELECT * FROM users WHERE age > ?"
+
+
+def make_db(path, rows):
+    """Create a users table with `rows` rows."""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                 "email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+        ((f"user{i}", f"user{i}@example.com", 18 + i % 80) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def consume(rows, batched):
+    """Walk the result the way a caller would; return the row count."""
+    count = 0
+    for item in rows:
+        count += len(item) if batched else 1
+    return count
+
+
+def run(label, path, **options):
+    """Run the query once and print the row count, time and peak memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with ExecuteQuery(path, QUERY, (25,), **options) as rows:
+        count = consume(rows, options.get("batch_size") is not None)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<22} {count:>9} rows {elapsed:>7.3f}s "
+          f"peak {peak / 1024 / 1024:>8.2f} MiB")
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "example.db")
+        make_db(path, rows)
+        run("fetchall", path)
+        run("fetchall dict", path, row_factory="dict")
+        run("stream", path, stream=True)
+        run("stream namedtuple", path, stream=True, row_factory="namedtuple")
+        run("stream dict", path, stream=True, row_factory="dict")
+        run("stream batches 1000", path, stream=True, batch_size=1000)
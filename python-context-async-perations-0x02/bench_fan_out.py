@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: fan_out throughput as concurrency grows from 1 to 64, against
+running the same queries one after another on a single connection.
+
+Usage:
+    python3 bench_fan_out.py [queries] [rows]
+
+Each query is an aggregate over an age range of a scratch example.db
+(created in a temporary directory), so it spends its time inside SQLite,
+which releases the GIL while it runs.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from async_pool import AsyncConnectionPool
+from bench_execute_memory import make_db
+
+fan_out = __import__('3-concurrent').fan_out
+
+QUERY = ("SELECT count(*), avg(length(email)) FROM users "
+         "WHERE age BETWEEN ? AND ? AND name LIKE ?")
+
+
+def make_queries(count):
+    """Parameterized queries over different age ranges."""
+    return [(QUERY, (18 + i % 60, 38 + i % 60, f"%{i % 10}%"))
+            for i in range(count)]
+
+
+def sequential(path, queries):
+    """Baseline: one connection, one query at a time."""
+    conn = sqlite3.connect(path)
+    start = time.perf_counter()
+    for query, params in queries:
+        conn.execute(query, params).fetchall()
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+async def concurrent(path, queries, limit):
+    """fan_out over a pool sized to the concurrency limit."""
+    pool = AsyncConnectionPool(path, size=limit)
+    start = time.perf_counter()
+    async for result in fan_out(queries, limit=limit, pool=pool):
+        if result.error:
+            raise result.error
+    elapsed = time.perf_counter() - start
+    await pool.close()
+    return elapsed
+
+
+def report(label, count, elapsed, baseline):
+    print(f"{label:<14} {count:>6} queries {elapsed:>7.3f}s "
+          f"{count / elapsed:>8.0f} q/sec {baseline / elapsed:>6.2f}x")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "example.db")
+        make_db(path, rows)
+        queries = make_queries(count)
+        baseline = sequential(path, queries)
+        report("sequential", count, baseline, baseline)
+        for limit in (1, 2, 4, 8, 16, 32, 64):
+            elapsed = asyncio.run(concurrent(path, queries, limit))
+            report(f"fan_out x{limit}", count, elapsed, baseline)
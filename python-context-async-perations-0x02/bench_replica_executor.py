@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: read latency while a writer keeps committing, with every
+query on one shared pool (rollback journal) against ReplicaExecutor
+(serialized writer, mode=ro readers, WAL).
+
+Usage:
+    python3 bench_replica_executor.py [seconds] [readers]
+
+`readers` tasks run point lookups while one task updates rows in small
+transactions, against a fresh scratch example.db for each variant.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from async_pool import AsyncConnectionPool
+from bench_execute_memory import make_db
+from replica_executor import ReplicaExecutor
+
+READ = "SELECT * FROM users WHERE id = ?"
+WRITE = "UPDATE users SET age = age + 1 WHERE id BETWEEN ? AND ?"
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+async def load(read, write, seconds, readers):
+    """Run reader tasks and one writer task; return read latencies and writes."""
+    latencies, writes = [], 0
+    deadline = time.perf_counter() + seconds
+
+    async def reader(n):
+        i = n
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await read(READ, (i % 10000 + 1,))
+            latencies.append(time.perf_counter() - start)
+            i += readers
+
+    async def writer():
+        nonlocal writes
+        i = 0
+        while time.perf_counter() < deadline:
+            first = i * 50 % 10000 + 1
+            await write(WRITE, (first, first + 49))
+            writes += 1
+            i += 1
+
+    await asyncio.gather(writer(), *(reader(n) for n in range(readers)))
+    return latencies, writes
+
+
+async def shared_pool(path, seconds, readers):
+    pool = AsyncConnectionPool(path, size=readers + 1, pragmas={})
+
+    async def read(query, params):
+        async with pool.connection() as db:
+            return await db.execute_fetchall(query, params)
+
+    async def write(query, params):
+        async with pool.connection() as db:
+            await db.execute(query, params)
+            await db.commit()
+
+    try:
+        return await load(read, write, seconds, readers)
+    finally:
+        await pool.close()
+
+
+async def replica(path, seconds, readers):
+    executor = ReplicaExecutor(path, readers=readers)
+    try:
+        return await load(executor.read, executor.write, seconds, readers)
+    finally:
+        await executor.close()
+
+
+def report(label, latencies, writes, seconds):
+    print(f"{label:<12} reads/sec {len(latencies) / seconds:>8.0f} "
+          f"writes/sec {writes / seconds:>6.0f} "
+          f"read p50 {percentile(latencies, 50) * 1000:>6.2f}ms "
+          f"p99 {percentile(latencies, 99) * 1000:>7.2f}ms "
+          f"max {max(latencies) * 1000:>8.2f}ms")
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 3.0
+    readers = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    for label, variant in (("shared pool", shared_pool), ("replica", replica)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "example.db")
+            make_db(path, 10000)
+            latencies, writes = asyncio.run(variant(path, seconds, readers))
+            report(label, latencies, writes, seconds)
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Async executor with one serialized writer and read-only reader connections
+"""
+
+import asyncio
+import os
+from urllib.parse import quote
+
+import aiosqlite
+
+from async_pool import AsyncConnectionPool
+
+READER_PRAGMAS = {
+    "query_only": "ON",
+    "cache_size": -16000,
+}
+
+
+class _Snapshot:
+    """Reader connection holding one read transaction (a WAL snapshot)."""
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.checkout = None
+
+    async def __aenter__(self):
+        await self.executor._ensure_wal()
+        self.checkout = self.executor.readers.connection()
+        db = await self.checkout.__aenter__()
+        try:
+            await db.execute("BEGIN")
+            # the snapshot is taken by the first read, not by BEGIN
+            await db.execute_fetchall("SELECT 1 FROM sqlite_master LIMIT 1")
+        except BaseException:
+            await self.checkout.__aexit__(None, None, None)
+            raise
+        return db
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.checkout.__aexit__(exc_type, exc_val, exc_tb)  # rolls back
+
+
+class _WriteTransaction:
+    """Writer connection inside BEGIN IMMEDIATE, held under the writer lock."""
+
+    def __init__(self, executor):
+        self.executor = executor
+
+    async def __aenter__(self):
+        await self.executor._write_lock.acquire()
+        try:
+            db = await self.executor._get_writer()
+            await db.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            self.executor._write_lock.release()
+            raise
+        return db
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        db = self.executor._writer
+        try:
+            if exc_type is None:
+                try:
+                    await db.execute("COMMIT")
+                except BaseException:
+                    # don't hand the next writer an open transaction
+                    if db.in_transaction:
+                        await db.execute("ROLLBACK")
+                    raise
+            else:
+                await db.execute("ROLLBACK")
+        finally:
+            self.executor._write_lock.release()
+
+
+class ReplicaExecutor:
+    """
+    Route reads and writes to separate connections of one WAL database.
+
+    - writes go through a single writer connection, one at a time
+      (write() / transaction()), so writers never fight over the lock
+    - reads run in parallel on a pool of `mode=ro` connections (read() /
+      snapshot()); in WAL mode each read sees a consistent snapshot of the
+      last commit and is never blocked by the writer
+
+    The database is switched to WAL when the writer is first opened. Call
+    `await executor.close()` before the event loop ends.
+    """
+
+    def __init__(self, db_name="example.db", readers=4, timeout=30.0,
+                 pragmas=None):
+        """Initialize with database name and reader pool size."""
+        self.db_name = db_name
+        self.timeout = timeout
+        self.pragmas = pragmas
+        uri = f"file:{quote(os.path.abspath(db_name))}?mode=ro"
+        self.readers = AsyncConnectionPool(uri, size=readers, timeout=timeout,
+                                           pragmas=READER_PRAGMAS, uri=True)
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+        self._open_lock = asyncio.Lock()
+        self.reads = 0
+        self.writes = 0
+
+    async def _get_writer(self):
+        """Open the writer connection (and switch to WAL) on first use."""
+        async with self._open_lock:
+            if self._writer is None:
+                db = await aiosqlite.connect(self.db_name, timeout=self.timeout,
+                                             isolation_level=None)
+                pragmas = {"journal_mode": "WAL", "synchronous": "NORMAL"}
+                pragmas.update(self.pragmas or {})
+                for name, value in pragmas.items():
+                    await db.execute(f"PRAGMA {name} = {value}")
+                self._writer = db
+            return self._writer
+
+    async def _ensure_wal(self):
+        """Readers rely on WAL, which the writer turns on when it opens."""
+        if self._writer is None:
+            await self._get_writer()
+
+    async def read(self, query, params=()):
+        """Run a read-only query on a reader connection; return all rows."""
+        await self._ensure_wal()
+        async with self.readers.connection() as db:
+            rows = await db.execute_fetchall(query, params)
+        self.reads += 1
+        return rows
+
+    def snapshot(self):
+        """
+        async with executor.snapshot() as db: every query inside sees the
+        same committed state, whatever the writer does meanwhile.
+        """
+        return _Snapshot(self)
+
+    def transaction(self):
+        """async with executor.transaction() as db: several writes, one commit."""
+        return _WriteTransaction(self)
+
+    async def write(self, query, params=()):
+        """Run one write statement in its own transaction; return rowcount."""
+        async with self.transaction() as db:
+            cursor = await db.execute(query, params)
+            rowcount = cursor.rowcount
+            await cursor.close()
+        self.writes += 1
+        return rowcount
+
+    async def executemany(self, query, seq_of_params):
+        """Run a write statement for every parameter set in one transaction."""
+        async with self.transaction() as db:
+            await db.executemany(query, seq_of_params)
+        self.writes += 1
+
+    async def close(self):
+        """Close the writer and the reader pool."""
+        await self.readers.close()
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+
+    def stats(self):
+        """Read/write counters and reader pool state."""
+        return {"reads": self.reads, "writes": self.writes,
+                "readers": self.readers.stats()}
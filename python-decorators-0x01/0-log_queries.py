@@ -1,19 +1,43 @@
 #!/usr/bin/env python3
 import sqlite3
 import functools
-from datetime import datetime
-
-
-#### decorator to log SQL queries
-def log_queries(func):
-    @functools.wraps(func)
-    def wrapper(*args, **kwargs):
-        query = kwargs.get("query") if "query" in kwargs else args[0] if args else None
-        if query:
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            print(f"[LOG][{timestamp}] QUERY: {query}")
-        return func(*args, **kwargs)
-    return wrapper
+import sys
+import time
+
+from tracing import get_tracer, result_rows
+
+
+#### decorator to trace SQL queries (see tracing.QueryTracer)
+def log_queries(func=None, *, tracer=None):
+    """
+    Record query text, fingerprint, duration, rows returned and caller
+    for every call, written as JSON lines by a background thread.
+    Use as @log_queries or @log_queries(tracer=QueryTracer(...)).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            query = kwargs.get("query") if "query" in kwargs else args[0] if args else None
+            if not query:
+                return func(*args, **kwargs)
+            caller = sys._getframe(1)
+            result, error = None, None
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = repr(e)
+                raise
+            finally:
+                (tracer or get_tracer()).observe(
+                    query, time.perf_counter() - start, result_rows(result),
+                    caller, error)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 
 @log_queries
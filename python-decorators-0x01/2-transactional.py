@@ -1,6 +1,14 @@
 #!/usr/bin/env python3
+import queue
 import sqlite3
 import functools
+import threading
+import time
+from concurrent.futures import Future
+
+from db_pool import DEFAULT_PRAGMAS
+from result_cache import default_cache
+from sql_text import write_recorder
 
 
 def with_db_connection(func):
@@ -15,17 +23,254 @@ def with_db_connection(func):
     return wrapper
 
 
-def transactional(func):
-    @functools.wraps(func)
-    def wrapper(conn, *args, **kwargs):
-        try:
-            result = func(conn, *args, **kwargs)
-            conn.commit()   # commit if no exception
+#### open transaction depth per connection (sqlite3 connections take no weakrefs)
+_depth = {}
+_depth_lock = threading.Lock()
+
+
+def _enter(conn):
+    with _depth_lock:
+        depth = _depth.get(id(conn), 0)
+        _depth[id(conn)] = depth + 1
+    return depth
+
+
+def _exit(conn, depth):
+    with _depth_lock:
+        if depth:
+            _depth[id(conn)] = depth
+        else:
+            _depth.pop(id(conn), None)
+
+
+def _run_in_savepoint(conn, name, func, *args, **kwargs):
+    """Run func inside SAVEPOINT name; only its own writes are undone on error."""
+    conn.execute(f"SAVEPOINT {name}")
+    try:
+        result = func(conn, *args, **kwargs)
+    except BaseException:
+        conn.execute(f"ROLLBACK TO {name}")
+        conn.execute(f"RELEASE {name}")
+        raise
+    conn.execute(f"RELEASE {name}")
+    return result
+
+
+def transactional(func=None, *, group_commit=None):
+    """
+    Commit on success, roll back on error. A transactional function called
+    from inside another one runs in a SAVEPOINT instead, so only the
+    outermost call commits and an inner failure undoes just its own writes.
+
+    The outermost call owns the connection's trace callback (it records the
+    written tables for the query cache) and clears it when it returns, so
+    don't set one of your own on a connection inside a transaction.
+
+    With group_commit=GroupCommitter(...) the call is handed to the
+    committer's writer thread, which supplies the connection: don't stack
+    with_db_connection on top of it.
+    """
+    def decorator(func):
+        if group_commit is not None:
+            @functools.wraps(func)
+            def grouped(*args, **kwargs):
+                return group_commit.submit(func, *args, **kwargs).result()
+            return grouped
+
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            depth = _enter(conn)
+            try:
+                if depth:
+                    return _run_in_savepoint(conn, f"sp_{depth}", func,
+                                             *args, **kwargs)
+                statements = []
+                conn.set_trace_callback(write_recorder(statements))  # record writes for the cache
+                try:
+                    if not conn.in_transaction:
+                        conn.execute("BEGIN")  # so savepoints nest inside it
+                    result = func(conn, *args, **kwargs)
+                    conn.commit()   # commit if no exception
+                except Exception as e:
+                    conn.rollback()  # rollback if error occurs
+                    raise e
+                finally:
+                    conn.set_trace_callback(None)
+            finally:
+                _exit(conn, depth)
+            default_cache.invalidate_statements(statements)  # drop stale cached reads
             return result
-        except Exception as e:
-            conn.rollback()  # rollback if error occurs
-            raise e
-    return wrapper
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+class GroupCommitter:
+    """
+    Group commit: transactions from concurrent callers share one
+    BEGIN IMMEDIATE ... COMMIT on a single writer connection, so many small
+    writes pay for one fsync. Each call runs in its own SAVEPOINT; a failing
+    call is rolled back alone and gets its exception, the rest commit.
+
+    A batch closes at max_batch calls or max_wait seconds after its first
+    call, whichever comes first. Callers block until their batch commits.
+    """
+
+    def __init__(self, database="users.db", max_batch=64, max_wait=0.002,
+                 timeout=30.0, pragmas=None):
+        self.database = database
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self._queue = queue.Queue()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._closed = None  # set to the reason once no more calls are taken
+        self._started_at = None
+        self.transactions = 0
+        self.failed = 0
+        self.commits = 0
+
+    def submit(self, func, *args, **kwargs):
+        """
+        Queue func(conn, *args, **kwargs); returns a Future. Raises
+        RuntimeError once the committer is closed or its writer has died.
+        """
+        future = Future()
+        with self._writer_lock:
+            if self._closed is not None:
+                raise RuntimeError(f"GroupCommitter is closed: {self._closed}")
+            if self._writer is None:
+                self._started_at = time.monotonic()
+                self._writer = threading.Thread(
+                    target=self._run, name="group-commit-writer", daemon=True)
+                self._writer.start()
+            self._queue.put((func, args, kwargs, future))
+        return future
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, timeout=self.timeout,
+                               isolation_level=None)  # BEGIN/COMMIT by hand
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        jobs = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(jobs) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                job = self._queue.get(timeout=remaining) if remaining > 0 \
+                    else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)  # stop after this batch
+                break
+            jobs.append(job)
+        return jobs
+
+    def _run(self):
+        error = None
+        conn = None
+        try:
+            conn = self._connect()
+            while True:
+                jobs = self._next_batch()
+                if jobs is None:
+                    break
+                self._commit_batch(conn, jobs)
+        except BaseException as e:
+            error = e  # reported to the callers by _fail_queued
+        finally:
+            if conn is not None:
+                conn.close()
+            self._fail_queued(error)
+
+    def _fail_queued(self, error):
+        """Stop taking calls and fail every call still queued."""
+        with self._writer_lock:
+            if self._closed is None:
+                self._closed = repr(error) if error is not None else "closed"
+        failure = RuntimeError(f"GroupCommitter is closed: {self._closed}")
+        if error is not None:
+            failure.__cause__ = error
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None and job[3].set_running_or_notify_cancel():
+                job[3].set_exception(failure)
+
+    def _commit_batch(self, conn, jobs):
+        jobs = [job for job in jobs if job[3].set_running_or_notify_cancel()]
+        if not jobs:
+            return
+        statements = []
+        results = []
+        conn.set_trace_callback(write_recorder(statements))
+        depth = _enter(conn)  # nested transactional calls use savepoints
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for func, args, kwargs, future in jobs:
+                try:
+                    results.append((future, _run_in_savepoint(
+                        conn, "group_job", func, *args, **kwargs), None))
+                except BaseException as e:  # one bad call must not kill the writer
+                    results.append((future, None, e))
+            conn.execute("COMMIT")
+        except BaseException as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for _, _, _, future in jobs:
+                future.set_exception(e)
+            self.failed += len(jobs)
+            if not isinstance(e, Exception):
+                raise
+            return
+        finally:
+            _exit(conn, depth)
+            conn.set_trace_callback(None)
+
+        self.commits += 1
+        default_cache.invalidate_statements(statements)
+        for future, result, error in results:
+            self.transactions += 1
+            if error is not None:
+                self.failed += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def close(self):
+        """Commit whatever is queued, then stop the writer thread."""
+        with self._writer_lock:
+            if self._closed is None:
+                self._closed = "closed"
+                if self._writer is not None:
+                    self._queue.put(None)
+        if self._writer is not None:
+            self._writer.join()
+
+    def stats(self):
+        """Transactions/sec against commits/sec since the first call."""
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        return {
+            "transactions": self.transactions,
+            "failed": self.failed,
+            "commits": self.commits,
+            "avg_batch": self.transactions / self.commits if self.commits else 0.0,
+            "transactions_per_sec": self.transactions / elapsed if elapsed else 0.0,
+            "commits_per_sec": self.commits / elapsed if elapsed else 0.0,
+        }
 
 
 @with_db_connection
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 import time
+import random
 import sqlite3
+import asyncio
 import functools
+import threading
 
 
 #### with_db_connection decorator
@@ -17,21 +20,188 @@ def with_db_connection(func):
     return wrapper
 
 
+#### transient error classification
+SQLITE_BUSY = 5
+SQLITE_LOCKED = 6
+TRANSIENT_MESSAGES = ("database is locked", "database table is locked", "busy")
+
+
+def is_transient(exc):
+    """True for errors worth retrying: SQLITE_BUSY / SQLITE_LOCKED."""
+    if not isinstance(exc, sqlite3.OperationalError):
+        return False
+    code = getattr(exc, "sqlite_errorcode", None)
+    if code is not None and code & 0xFF in (SQLITE_BUSY, SQLITE_LOCKED):
+        return True
+    message = str(exc).lower()
+    return any(text in message for text in TRANSIENT_MESSAGES)
+
+
+#### backoff policies: delays() yields the sleep before each retry
+class ConstantBackoff:
+    """Same delay every time (the original behaviour)."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def delays(self):
+        while True:
+            yield self.delay
+
+
+class ExponentialBackoff:
+    """base * factor**n capped at cap, with full jitter by default."""
+
+    def __init__(self, base=0.1, factor=2, cap=10.0, jitter=True):
+        self.base = base
+        self.factor = factor
+        self.cap = cap
+        self.jitter = jitter
+
+    def delays(self):
+        attempt = 0
+        while True:
+            delay = min(self.cap, self.base * self.factor ** attempt)
+            yield random.uniform(0, delay) if self.jitter else delay
+            attempt += 1
+
+
+class DecorrelatedJitter:
+    """Each delay is random between base and 3x the previous one, capped."""
+
+    def __init__(self, base=0.1, cap=10.0):
+        self.base = base
+        self.cap = cap
+
+    def delays(self):
+        delay = self.base
+        while True:
+            delay = min(self.cap, random.uniform(self.base, delay * 3))
+            yield delay
+
+
+#### retry budget: retries allowed as a fraction of calls, per process
+class RetryBudget:
+    """
+    Token bucket that caps retries at `ratio` of calls plus `min_per_sec`,
+    so a failing database does not get hammered by every worker at once.
+    """
+
+    def __init__(self, ratio=0.2, min_per_sec=10, max_tokens=100):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.max_tokens = max_tokens
+        self._tokens = float(max_tokens)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.exhausted = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.max_tokens, self._tokens
+                           + (now - self._updated) * self.min_per_sec)
+        self._updated = now
+
+    def deposit(self):
+        """Called once per call."""
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self):
+        """Take a token for one retry; False when the budget is spent."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+
+default_budget = RetryBudget()
+
+
+class _Retry:
+    """Shared bookkeeping of the sync and async decorators."""
+
+    def __init__(self, retries, delay, backoff, deadline, retry_on, budget):
+        self.retries = retries
+        self.backoff = backoff or ExponentialBackoff(base=delay, cap=delay * 8)
+        self.deadline = deadline
+        self.retry_on = retry_on
+        self.budget = budget
+
+    def start(self):
+        if self.budget is not None:
+            self.budget.deposit()
+        return time.monotonic(), self.backoff.delays()
+
+    def next_delay(self, attempt, error, started, delays):
+        """Delay before the next attempt, or None to give up."""
+        if attempt >= self.retries or not self.retry_on(error):
+            return None
+        delay = next(delays)
+        if self.deadline is not None and \
+                time.monotonic() - started + delay > self.deadline:
+            return None
+        if self.budget is not None and not self.budget.withdraw():
+            return None
+        print(f"[Retry {attempt}/{self.retries}] Error: {error}. "
+              f"Retrying in {delay:.2f}s...")
+        return delay
+
+
 #### retry_on_failure decorator
-def retry_on_failure(retries=3, delay=2):
+def retry_on_failure(retries=3, delay=2, backoff=None, deadline=None,
+                     retry_on=is_transient, budget=default_budget):
+    """
+    Retry transient failures (see is_transient) up to `retries` attempts.
+    - backoff: ConstantBackoff / ExponentialBackoff / DecorrelatedJitter;
+      defaults to exponential backoff with jitter starting at `delay`
+    - deadline: give up once this many seconds have passed overall
+    - budget: shared RetryBudget, None to disable
+    Other errors are raised straight away.
+    """
+    policy = _Retry(retries, delay, backoff, deadline, retry_on, budget)
+
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(1, retries + 1):
+            started, delays = policy.start()
+            attempt = 1
+            while True:
                 try:
                     return func(*args, **kwargs)
                 except Exception as e:
-                    last_exception = e
-                    print(f"[Retry {attempt}/{retries}] Error: {e}. Retrying in {delay}s...")
-                    time.sleep(delay)
-            # If all retries fail, raise the last exception
-            raise last_exception
+                    wait = policy.next_delay(attempt, e, started, delays)
+                    if wait is None:
+                        raise
+                    time.sleep(wait)
+                    attempt += 1
+        return wrapper
+    return decorator
+
+
+def async_retry_on_failure(retries=3, delay=2, backoff=None, deadline=None,
+                           retry_on=is_transient, budget=default_budget):
+    """retry_on_failure for coroutine functions; waits with asyncio.sleep."""
+    policy = _Retry(retries, delay, backoff, deadline, retry_on, budget)
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started, delays = policy.start()
+            attempt = 1
+            while True:
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    wait = policy.next_delay(attempt, e, started, delays)
+                    if wait is None:
+                        raise
+                    await asyncio.sleep(wait)
+                    attempt += 1
         return wrapper
     return decorator
 
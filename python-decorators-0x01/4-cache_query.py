@@ -3,9 +3,11 @@ import time
 import sqlite3
 import functools
 
+from result_cache import default_cache
 
-#### simple in-memory cache
-query_cache = {}
+
+#### bounded LRU/TTL result cache (see result_cache.QueryCache)
+query_cache = default_cache
 
 
 #### with_db_connection decorator
@@ -22,19 +24,48 @@ def with_db_connection(func):
 
 
 #### cache_query decorator
-def cache_query(func):
-    @functools.wraps(func)
-    def wrapper(conn, *args, **kwargs):
-        query = kwargs.get("query") if "query" in kwargs else args[0] if args else None
-        if query in query_cache:
-            print(f"[CACHE HIT] Returning cached result for: {query}")
-            return query_cache[query]
-
-        print(f"[CACHE MISS] Executing and caching result for: {query}")
-        result = func(conn, *args, **kwargs)
-        query_cache[query] = result
-        return result
-    return wrapper
+def cache_query(func=None, *, cache=None, ttl=None, stale_ttl=None,
+                connect=None):
+    """
+    Cache results keyed by normalized query text plus bound parameters.
+    Use as @cache_query or @cache_query(cache=..., ttl=..., stale_ttl=...).
+    The query is the `query` keyword or first argument after conn;
+    parameters are the `params` keyword or the next argument.
+
+    Concurrent misses for the same key run the query once (single flight).
+    With stale_ttl, an expired result is returned for up to stale_ttl more
+    seconds while a background thread re-runs the query on a connection
+    from connect() (default: a new connection to users.db).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            store = cache if cache is not None else query_cache
+            query = kwargs.get("query") if "query" in kwargs else args[0] if args else None
+            params = kwargs.get("params") if "params" in kwargs else args[1] if len(args) > 1 else None
+            if query is None:
+                return func(conn, *args, **kwargs)
+
+            def compute():
+                print(f"[CACHE MISS] Executing and caching result for: {query}")
+                return func(conn, *args, **kwargs)
+
+            def refresh():
+                fresh_conn = connect() if connect else sqlite3.connect("users.db")
+                try:
+                    return func(fresh_conn, *args, **kwargs)
+                finally:
+                    fresh_conn.close()
+
+            return store.get_or_compute(
+                store.make_key(query, params), compute, ttl=ttl,
+                stale_ttl=stale_ttl,
+                refresh=refresh if (stale_ttl or store.stale_ttl) else None)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
 
 
 @with_db_connection
@@ -52,3 +83,5 @@ if __name__ == "__main__":
 
     users_again = fetch_users_with_cache(query="SELECT * FROM users")
     print(users_again)
+
+    print(query_cache.stats())
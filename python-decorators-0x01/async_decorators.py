@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+async def versions of the decorators in this directory.
+
+Each decorator checks whether it wraps a coroutine function. Coroutine
+functions get a native asyncio wrapper; plain functions get the original
+synchronous decorator, so one import serves both kinds of code:
+
+- log_queries: records into the same tracer as 0-log_queries
+- with_db_connection: aiosqlite connection from an AsyncSQLitePool
+- transactional: commit/rollback, SAVEPOINTs for nested calls
+- retry_on_failure: 3-retry_on_failure policies, asyncio.sleep backoff
+- cache_query: the shared QueryCache, with asyncio single flight
+
+    @with_db_connection
+    @retry_on_failure(retries=3, delay=0.1)
+    @transactional
+    async def update_user_email(conn, user_id, new_email):
+        await conn.execute("UPDATE users SET email = ? WHERE id = ?",
+                           (new_email, user_id))
+
+A connection belongs to one task at a time: don't share it between
+tasks running concurrently.
+"""
+import asyncio
+import functools
+import inspect
+import sys
+import time
+import weakref
+
+import aiosqlite
+
+from db_pool import DEFAULT_PRAGMAS
+from result_cache import default_cache
+from sql_text import write_recorder
+from tracing import get_tracer, result_rows
+
+_log_queries = __import__('0-log_queries')
+_with_db_connection = __import__('1-with_db_connection')
+_transactional = __import__('2-transactional')
+_retry = __import__('3-retry_on_failure')
+_cache_query = __import__('4-cache_query')
+
+
+class AsyncSQLitePool:
+    """
+    Up to `size` aiosqlite connections to one database, opened on demand
+    and tuned with PRAGMAs. Callers wait up to `timeout` seconds for a free
+    one. Call `await pool.close()` before the event loop ends.
+    """
+
+    def __init__(self, database="users.db", size=5, timeout=30.0,
+                 pragmas=None):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self._idle = []
+        self._open = 0
+        self._cond = None
+        self.checkouts = 0
+        self.connects = 0
+
+    def _condition(self):
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def _connect(self):
+        conn = await aiosqlite.connect(self.database)
+        for name, value in self.pragmas.items():
+            await conn.execute(f"PRAGMA {name} = {value}")
+        self.connects += 1
+        return conn
+
+    async def acquire(self):
+        """Check out a connection, opening one if below size."""
+        cond = self._condition()
+        async with cond:
+            try:
+                await asyncio.wait_for(
+                    cond.wait_for(lambda: self._idle or self._open < self.size),
+                    self.timeout)
+            except asyncio.TimeoutError:
+                raise TimeoutError(
+                    f"No connection to {self.database} free within "
+                    f"{self.timeout}s") from None
+            self.checkouts += 1
+            if self._idle:
+                return self._idle.pop()
+            self._open += 1
+        try:
+            return await self._connect()
+        except BaseException:
+            async with cond:
+                self._open -= 1
+                cond.notify()
+            raise
+
+    async def release(self, conn):
+        """Return a connection, rolling back anything left uncommitted."""
+        cond = self._condition()
+        try:
+            if conn.in_transaction:
+                await conn.rollback()
+        except Exception:
+            await conn.close()
+            async with cond:
+                self._open -= 1
+                cond.notify()
+            return
+        async with cond:
+            self._idle.append(conn)
+            cond.notify()
+
+    def connection(self):
+        """async with pool.connection() as conn: ..."""
+        return _Checkout(self)
+
+    async def close(self):
+        """Close the idle connections."""
+        cond = self._condition()
+        async with cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn in idle:
+            await conn.close()
+
+    def stats(self):
+        return {"open": self._open, "idle": len(self._idle),
+                "checkouts": self.checkouts, "connects": self.connects}
+
+
+class _Checkout:
+    def __init__(self, pool):
+        self.pool = pool
+        self.conn = None
+
+    async def __aenter__(self):
+        self.conn = await self.pool.acquire()
+        return self.conn
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.pool.release(self.conn)
+
+
+#### one default pool per event loop (pool state is bound to its loop)
+_default_pools = weakref.WeakKeyDictionary()
+
+
+def get_default_pool():
+    """Shared pool to users.db for the running event loop."""
+    loop = asyncio.get_running_loop()
+    pool = _default_pools.get(loop)
+    if pool is None:
+        pool = _default_pools[loop] = AsyncSQLitePool()
+    return pool
+
+
+def _query_args(args, kwargs):
+    query = kwargs.get("query") if "query" in kwargs else args[0] if args else None
+    params = kwargs.get("params") if "params" in kwargs else args[1] if len(args) > 1 else None
+    return query, params
+
+
+#### log_queries
+def log_queries(func=None, *, tracer=None):
+    """log_queries (see 0-log_queries) for sync and async functions."""
+    def decorator(func):
+        if not inspect.iscoroutinefunction(func):
+            return _log_queries.log_queries(func, tracer=tracer)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            query = kwargs.get("query") if "query" in kwargs else args[0] if args else None
+            if not query:
+                return await func(*args, **kwargs)
+            caller = sys._getframe(1)
+            result, error = None, None
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+                return result
+            except Exception as e:
+                error = repr(e)
+                raise
+            finally:
+                (tracer or get_tracer()).observe(
+                    query, time.perf_counter() - start, result_rows(result),
+                    caller, error)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+#### with_db_connection
+def with_db_connection(func=None, *, pool=None):
+    """
+    Pass a pooled aiosqlite connection as the first argument of a coroutine
+    function (pool defaults to get_default_pool()). Plain functions get the
+    original with_db_connection.
+    """
+    def decorator(func):
+        if not inspect.iscoroutinefunction(func):
+            return _with_db_connection.with_db_connection(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with (pool or get_default_pool()).connection() as conn:
+                return await func(conn, *args, **kwargs)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+#### transactional
+_depth = {}
+
+
+async def _in_savepoint(conn, name, func, *args, **kwargs):
+    await conn.execute(f"SAVEPOINT {name}")
+    try:
+        result = await func(conn, *args, **kwargs)
+    except BaseException:
+        await conn.execute(f"ROLLBACK TO {name}")
+        await conn.execute(f"RELEASE {name}")
+        raise
+    await conn.execute(f"RELEASE {name}")
+    return result
+
+
+def transactional(func):
+    """
+    Commit on success, roll back on error; nested transactional calls on
+    the same connection run in a SAVEPOINT. Written tables are invalidated
+    in the shared query cache after commit, as in 2-transactional, which
+    also owns the connection's trace callback for the outermost call.
+    """
+    if not inspect.iscoroutinefunction(func):
+        return _transactional.transactional(func)
+
+    @functools.wraps(func)
+    async def wrapper(conn, *args, **kwargs):
+        depth = _depth.get(id(conn), 0)
+        _depth[id(conn)] = depth + 1
+        try:
+            if depth:
+                return await _in_savepoint(conn, f"sp_{depth}", func,
+                                           *args, **kwargs)
+            statements = []
+            await conn.set_trace_callback(write_recorder(statements))
+            try:
+                if not conn.in_transaction:
+                    await conn.execute("BEGIN")
+                result = await func(conn, *args, **kwargs)
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+            finally:
+                await conn.set_trace_callback(None)
+        finally:
+            if depth:
+                _depth[id(conn)] = depth
+            else:
+                _depth.pop(id(conn), None)
+        default_cache.invalidate_statements(statements)
+        return result
+    return wrapper
+
+
+#### retry_on_failure
+def retry_on_failure(retries=3, delay=2, backoff=None, deadline=None,
+                     retry_on=_retry.is_transient, budget=_retry.default_budget):
+    """retry_on_failure (see 3-retry_on_failure); asyncio.sleep for coroutines."""
+    options = dict(retries=retries, delay=delay, backoff=backoff,
+                   deadline=deadline, retry_on=retry_on, budget=budget)
+
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            return _retry.async_retry_on_failure(**options)(func)
+        return _retry.retry_on_failure(**options)(func)
+    return decorator
+
+
+#### cache_query
+_flights = {}
+
+
+def _cancel_requested():
+    """True if the current task itself has been asked to cancel."""
+    task = asyncio.current_task()
+    cancelling = getattr(task, "cancelling", None)  # Python 3.11+
+    return bool(cancelling()) if cancelling is not None else False
+
+
+def cache_query(func=None, *, cache=None, ttl=None):
+    """
+    cache_query (see 4-cache_query) for coroutine functions. Concurrent
+    misses for one key in the same event loop await a single execution.
+    """
+    def decorator(func):
+        if not inspect.iscoroutinefunction(func):
+            return _cache_query.cache_query(func, cache=cache, ttl=ttl)
+
+        @functools.wraps(func)
+        async def wrapper(conn, *args, **kwargs):
+            store = cache if cache is not None else default_cache
+            query, params = _query_args(args, kwargs)
+            if query is None:
+                return await func(conn, *args, **kwargs)
+            key = store.make_key(query, params)
+            loop = asyncio.get_running_loop()
+            flight_key = (id(loop), id(store), key)
+            while True:
+                hit, value = store.get(key)
+                if hit:
+                    return value
+                flight = _flights.get(flight_key)
+                if flight is None:
+                    break
+                try:
+                    return await asyncio.shield(flight)
+                except asyncio.CancelledError:
+                    if not flight.cancelled() or _cancel_requested():
+                        raise
+                    # the leader was cancelled, not us: try again, maybe as leader
+
+            flight = _flights[flight_key] = loop.create_future()
+            generation = store.generation
+            print(f"[CACHE MISS] Executing and caching result for: {query}")
+            try:
+                value = await func(conn, *args, **kwargs)
+            except BaseException as e:
+                if isinstance(e, asyncio.CancelledError):
+                    flight.cancel()
+                else:
+                    flight.set_exception(e)
+                    flight.exception()  # waiters re-raise it; don't log it
+                raise
+            finally:
+                _flights.pop(flight_key, None)
+            store.set(key, value, ttl=ttl, generation=generation)
+            flight.set_result(value)
+            return value
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+@with_db_connection
+@cache_query
+async def fetch_users_with_cache(conn, query):
+    async with conn.execute(query) as cursor:
+        return await cursor.fetchall()
+
+
+#### fetch users twice; the second call is served from the cache
+async def main():
+    users = await fetch_users_with_cache(query="SELECT * FROM users")
+    users_again = await fetch_users_with_cache(query="SELECT * FROM users")
+    print(users == users_again)
+    await get_default_pool().close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Coalesce single-row queries into batched ones.
+
+batched_select turns many `get_user_by_id(user_id)` style calls into one
+`SELECT ... WHERE id IN (...)` and hands every caller its own row back;
+batched_write turns many `update_user_email(user_id, new_email)` calls
+into one executemany inside a single transaction.
+
+Calls are grouped in one of two ways:
+
+- window: concurrent callers arriving within `window` seconds of the first
+  one are flushed together; each caller blocks and gets its own result
+- explicit: inside `with batch():` calls return a concurrent.futures.Future
+  immediately and everything queued is flushed when the block exits
+
+Batches run on a connection from db_pool (users.db by default). IN lists
+are padded to a power of two so the same few statement texts are reused
+from sqlite3's statement cache.
+"""
+import functools
+import inspect
+import sqlite3
+import threading
+from collections import defaultdict
+from concurrent.futures import Future
+
+from db_pool import get_default_pool
+from result_cache import default_cache
+from sql_text import write_recorder
+
+_transactional = __import__('2-transactional')
+
+_local = threading.local()
+
+
+class batch:
+    """
+    Queue decorated calls made inside the block and run them in batches
+    when it exits. Calls return Futures; read them after the block.
+    """
+
+    def __enter__(self):
+        self._pending = defaultdict(list)
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.stack.pop()
+        pending, self._pending = self._pending, None
+        for batcher, calls in pending.items():
+            if exc_type is not None:
+                for _, future in calls:
+                    future.cancel()
+            else:
+                batcher.flush(calls)
+
+    def add(self, batcher, call):
+        self._pending[batcher].append(call)
+
+
+def _current_batch():
+    stack = getattr(_local, "stack", None)
+    return stack[-1] if stack else None
+
+
+def _padded_size(count):
+    size = 1
+    while size < count:
+        size *= 2
+    return size
+
+
+class _Batcher:
+    """Collects calls to one decorated function and flushes them together."""
+
+    def __init__(self, func, run, window, max_batch, pool):
+        self.func = func
+        self.run = run
+        self.window = window
+        self.max_batch = max_batch
+        self.pool = pool
+        self.signature = inspect.signature(func)
+        self._cond = threading.Condition()
+        self._pending = []
+        self.calls = 0
+        self.batches = 0
+
+    def bind(self, args, kwargs):
+        """Arguments of a call, without the leading conn parameter."""
+        bound = self.signature.bind(None, *args, **kwargs)
+        bound.apply_defaults()
+        return list(bound.arguments.items())[1:]
+
+    def __call__(self, *args, **kwargs):
+        call = (self.bind(args, kwargs), Future())
+        context = _current_batch()
+        if context is not None:
+            context.add(self, call)
+            return call[1]
+        if self._in_caller_transaction():
+            # don't tie other threads' calls to this thread's transaction
+            self.flush([call])
+            return call[1].result()
+
+        with self._cond:
+            self._pending.append(call)
+            leader = len(self._pending) == 1
+            if len(self._pending) >= self.max_batch:
+                self._cond.notify_all()
+        if leader:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.max_batch,
+                    timeout=self.window)
+                calls, self._pending = self._pending, []
+            self.flush(calls)
+        return call[1].result()
+
+    def _pool(self):
+        return self.pool if self.pool is not None else get_default_pool()
+
+    def _in_caller_transaction(self):
+        """True if this thread's own pooled connection is in a transaction."""
+        pool = self._pool()
+        if pool.mode != "thread":
+            return False
+        with pool.connection() as conn:
+            return conn.in_transaction
+
+    def flush(self, calls):
+        """Run queued calls in chunks of max_batch and resolve their futures."""
+        calls = [call for call in calls if call[1].set_running_or_notify_cancel()]
+        pool = self._pool()
+        for start in range(0, len(calls), self.max_batch):
+            chunk = calls[start:start + self.max_batch]
+            self.calls += len(chunk)
+            self.batches += 1
+            try:
+                with pool.connection() as conn:
+                    self.run(self, conn, chunk)
+            except Exception as e:
+                for _, future in chunk:
+                    if not future.done():
+                        future.set_exception(e)
+
+
+def _call_single(batcher, conn, arguments):
+    return batcher.func(conn, **dict(arguments))
+
+
+def _in_transaction(conn, work):
+    """
+    Run work(conn) and commit, or roll back if it raises. If conn is
+    already inside a transaction (a caller's transactional on the same
+    thread-mode connection), work runs in a SAVEPOINT instead and the
+    caller's transaction is neither committed nor rolled back.
+    """
+    if conn.in_transaction:
+        return _transactional._run_in_savepoint(conn, "batched_write", work)
+    try:
+        result = work(conn)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return result
+
+
+def batched_select(query, key=None, key_column=0, many=False,
+                   window=0.002, max_batch=500, pool=None):
+    """
+    Batch lookups by key into one query. `query` must contain an
+    `{ids}` slot for the IN list, e.g.
+    "SELECT * FROM users WHERE id IN ({ids})".
+    key names the parameter holding the lookup key (default: the first
+    one after conn); key_column is the index (or name) of the key in a
+    result row. Each caller gets the matching row (None if missing), or
+    the list of matching rows with many=True. A key that no returned row
+    equals in Python (SQLite may have coerced it, e.g. "1" for id 1) is
+    looked up with a single call, so batching never changes a result.
+    """
+    def run(batcher, conn, calls):
+        if len(calls) == 1:
+            arguments, future = calls[0]
+            future.set_result(_call_single(batcher, conn, arguments))
+            return
+
+        key_name = key or calls[0][0][0][0]
+        keys = [dict(arguments)[key_name] for arguments, _ in calls]
+        unique = list(dict.fromkeys(keys))
+        padded = unique + [unique[-1]] * (_padded_size(len(unique)) - len(unique))
+        sql = query.format(ids=", ".join("?" * len(padded)))
+
+        rows_by_key = defaultdict(list)
+        for row in conn.execute(sql, padded).fetchall():
+            rows_by_key[row[key_column]].append(row)
+        for key_value, (arguments, future) in zip(keys, calls):
+            rows = rows_by_key.get(key_value)
+            if rows is None:
+                # no row compares equal in Python, but SQLite may still match
+                # the key after type coercion (e.g. "1" for id 1): ask it
+                future.set_result(_call_single(batcher, conn, arguments))
+                continue
+            future.set_result(list(rows) if many else rows[0])
+
+    def decorator(func):
+        return functools.wraps(func)(
+            _Batcher(func, run, window, max_batch, pool))
+    return decorator
+
+
+def batched_write(query, params=None, window=0.002, max_batch=500, pool=None):
+    """
+    Batch single-row writes into one executemany in one transaction.
+    params maps a call's arguments (without conn) to the statement's
+    parameters; by default they are passed in signature order. If the
+    batch fails, each call is retried on its own so the error reaches
+    only the caller that caused it. Callers get None back. Cached reads of
+    the written tables are invalidated after each commit, as transactional
+    does. Called inside a transaction on the same pooled connection, the
+    write runs alone in a SAVEPOINT and is committed with that transaction.
+    """
+    def run(batcher, conn, calls):
+        rows = []
+        for arguments, _ in calls:
+            values = dict(arguments)
+            rows.append(params(**values) if params else tuple(values.values()))
+        try:
+            _in_transaction(conn, lambda conn: conn.executemany(query, rows))
+        except sqlite3.Error:
+            nested = conn.in_transaction
+            for arguments, future in calls:
+                statements = []
+                if not nested:  # an enclosing transactional owns the callback
+                    conn.set_trace_callback(write_recorder(statements))
+                try:
+                    result = _in_transaction(
+                        conn, lambda conn: _call_single(batcher, conn, arguments))
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                finally:
+                    if not nested:
+                        conn.set_trace_callback(None)
+                default_cache.invalidate_statements(statements)
+                future.set_result(result)
+            return
+        default_cache.invalidate_statements([query])
+        for _, future in calls:
+            future.set_result(None)
+
+    def decorator(func):
+        return functools.wraps(func)(
+            _Batcher(func, run, window, max_batch, pool))
+    return decorator
+
+
+#### Demo: coalesce lookups and email updates
+@batched_select("SELECT * FROM users WHERE id IN ({ids})")
+def get_user_by_id(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+@batched_write("UPDATE users SET email = ? WHERE id = ?",
+               params=lambda user_id, new_email: (new_email, user_id))
+def update_user_email(conn, user_id, new_email):
+    cursor = conn.cursor()
+    cursor.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+if __name__ == "__main__":
+    with batch():
+        users = [get_user_by_id(user_id=i) for i in range(1, 6)]
+    print([future.result() for future in users])
+    print(get_user_by_id.batches, "batch(es) for", get_user_by_id.calls, "calls")
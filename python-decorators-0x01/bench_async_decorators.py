@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: lookups/sec from asyncio code, sync decorators run in a thread
+pool against the native async decorators.
+
+Usage:
+    python3 bench_async_decorators.py [calls] [concurrency]
+
+Each variant runs `calls` get_user_by_id-style lookups with `concurrency`
+in flight, against a scratch users.db in a temporary directory:
+
+- threadpool: @with_db_connection (new connection per call) via run_in_executor
+- threadpool+pool: @with_pooled_connection via run_in_executor
+- native async: @async_decorators.with_db_connection on an AsyncSQLitePool
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import async_decorators
+from async_decorators import AsyncSQLitePool
+from bench_with_db_connection import lookup, make_db
+from db_pool import SQLitePool, with_pooled_connection
+
+
+def with_connection_to(path, func):
+    """with_db_connection (new connection per call) pointed at path."""
+    def wrapper(*args, **kwargs):
+        conn = sqlite3.connect(path)
+        try:
+            return func(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return wrapper
+
+
+async def async_lookup(conn, user_id):
+    rows = await conn.execute_fetchall(  # one round trip to aiosqlite's thread
+        "SELECT * FROM users WHERE id = ?", (user_id,))
+    return rows[0] if rows else None
+
+
+async def run(label, call, calls, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with semaphore:
+            return await call(i % 10000 + 1)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+    print(f"{label:<16} {calls:>7} calls {elapsed:>7.3f}s "
+          f"{calls / elapsed:>9.0f} calls/sec")
+
+
+async def main(path, calls, concurrency):
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+
+    plain = with_connection_to(path, lookup)
+    await run("threadpool", lambda user_id: loop.run_in_executor(
+        executor, plain, user_id), calls, concurrency)
+
+    pooled = with_pooled_connection(lookup, pool=SQLitePool(path, mode="thread"))
+    await run("threadpool+pool", lambda user_id: loop.run_in_executor(
+        executor, pooled, user_id), calls, concurrency)
+    executor.shutdown()
+
+    pool = AsyncSQLitePool(path, size=concurrency)
+    native = async_decorators.with_db_connection(async_lookup, pool=pool)
+    await run("native async", native, calls, concurrency)
+    await pool.close()
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.db")
+        make_db(path)
+        asyncio.run(main(path, calls, concurrency))
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Concurrency benchmark for cache_query.
+
+Usage:
+    python3 bench_cache_query.py [threads] [unique_queries]
+
+`threads` workers (default 64) start together and each runs every one of
+`unique_queries` queries (default 8) against a scratch SQLite database.
+It reports how many times each query actually reached the database: a
+plain check-then-set cache (the old dict behaviour) against the
+single-flight cache_query.
+"""
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from result_cache import QueryCache
+
+cache_query = __import__('4-cache_query').cache_query
+
+QUERY_DELAY = 0.05  # simulated query latency, keeps misses overlapping
+
+
+def make_db(path):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, age INTEGER)")
+    conn.executemany("INSERT INTO users (age) VALUES (?)",
+                     [(age,) for age in range(18, 100)])
+    conn.commit()
+    conn.close()
+
+
+def naive_cache(func):
+    """check-then-set over a plain dict, like the original cache_query."""
+    store = {}
+
+    def wrapper(conn, query):
+        if query in store:
+            return store[query]
+        result = func(conn, query)
+        store[query] = result
+        return result
+    return wrapper
+
+
+def run(label, decorate, path, threads, queries):
+    executions = Counter()
+    lock = threading.Lock()
+
+    def fetch(conn, query):
+        with lock:
+            executions[query] += 1
+        time.sleep(QUERY_DELAY)
+        return conn.execute(query).fetchall()
+
+    fetch = decorate(fetch)
+    barrier = threading.Barrier(threads)
+
+    def worker():
+        conn = sqlite3.connect(path)
+        barrier.wait()
+        for query in queries:
+            fetch(conn, query)
+        conn.close()
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+    elapsed = time.perf_counter() - start
+
+    per_key = [executions[query] for query in queries]
+    print(f"{label:<14} db executions/key: min={min(per_key)} "
+          f"max={max(per_key)} total={sum(per_key)}  {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    unique = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    queries = [f"SELECT * FROM users WHERE age > {age}" for age in range(unique)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        make_db(path)
+        run("check-then-set", naive_cache, path, threads, queries)
+        run("single-flight",
+            lambda func: cache_query(cache=QueryCache())(func),
+            path, threads, queries)
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Load test: tail latency under injected failures, with and without a
+circuit breaker in front of retry_on_failure.
+
+Usage:
+    python3 bench_circuit_breaker.py [threads] [outage_seconds]
+
+Worker threads call a simulated query for healthy / outage / recovery
+phases. During the outage each attempt blocks for LOCK_WAIT seconds (like
+SQLite's busy timeout) and fails with "database is locked". Without a
+breaker every call pays retries * (LOCK_WAIT + backoff); with one, calls
+fail fast once the circuit opens.
+"""
+import sqlite3
+import sys
+import threading
+import time
+
+from circuit_breaker import CircuitBreaker, CircuitOpenError
+
+retry_module = __import__('3-retry_on_failure')
+
+LOCK_WAIT = 0.05
+HEALTHY_WAIT = 0.001
+PHASE_SECONDS = 1.0
+THINK_TIME = 0.001  # per-request work between calls
+
+
+class Database:
+    """Simulated database that can be switched into an outage."""
+
+    def __init__(self):
+        self.down = False
+
+    def query(self):
+        if self.down:
+            time.sleep(LOCK_WAIT)
+            raise sqlite3.OperationalError("database is locked")
+        time.sleep(HEALTHY_WAIT)
+        return [(1, "user")]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p / 100 * len(values)))]
+
+
+def run(label, use_breaker, threads, outage):
+    db = Database()
+    retry = retry_module.retry_on_failure(
+        retries=3, delay=0.02, budget=retry_module.RetryBudget())
+    call = retry(db.query)
+    breaker = None
+    if use_breaker:
+        breaker = CircuitBreaker(failure_rate=0.5, window=0.5, min_calls=20,
+                                 open_timeout=0.5)
+        call = breaker(call)
+
+    latencies, outcomes = [], {"ok": 0, "failed": 0, "fast_fail": 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            start = time.perf_counter()
+            try:
+                call()
+                outcome = "ok"
+            except CircuitOpenError:
+                outcome = "fast_fail"
+            except sqlite3.OperationalError:
+                outcome = "failed"
+            with lock:
+                latencies.append(time.perf_counter() - start)
+                outcomes[outcome] += 1
+            time.sleep(THINK_TIME)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    time.sleep(PHASE_SECONDS)
+    db.down = True
+    time.sleep(outage)
+    db.down = False
+    time.sleep(PHASE_SECONDS)
+    stop.set()
+    for thread in workers:
+        thread.join()
+
+    print(f"{label:<12} calls={len(latencies):>6} "
+          f"p50={percentile(latencies, 50) * 1000:7.1f}ms "
+          f"p99={percentile(latencies, 99) * 1000:7.1f}ms "
+          f"max={max(latencies) * 1000:7.1f}ms {outcomes}")
+    if breaker is not None:
+        print(f"{'':<12} final state: {breaker.snapshot()['state']}")
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    outage = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    retry_module.print = lambda *args, **kwargs: None  # silence retry logs
+    run("no breaker", False, threads, outage)
+    run("breaker", True, threads, outage)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark: transactions/sec and commits/sec of transactional with one
+commit per call against group commit.
+
+Usage:
+    python3 bench_transactional.py [transactions] [threads]
+
+Every transaction updates one row of a scratch users.db (WAL,
+synchronous=FULL, so each commit is an fsync). Per-call mode gives each
+thread its own connection; group mode hands the calls to a GroupCommitter.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+transactional_module = __import__('2-transactional')
+transactional = transactional_module.transactional
+GroupCommitter = transactional_module.GroupCommitter
+
+PRAGMAS = {"journal_mode": "WAL", "synchronous": "FULL"}
+
+
+def make_db(path, rows=1000):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                 "email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+        [(f"user{i}", f"user{i}@example.com", 18 + i % 80) for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+
+def update_email(conn, user_id, new_email):
+    conn.execute("UPDATE users SET email = ? WHERE id = ?", (new_email, user_id))
+
+
+def run(label, make_call, transactions, threads, commits):
+    per_thread = transactions // threads
+
+    def worker(index):
+        call = make_call()
+        for i in range(per_thread):
+            user_id = (index * per_thread + i) % 1000 + 1
+            call(user_id=user_id, new_email=f"user{user_id}.{i}@example.com")
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = per_thread * threads
+    committed = commits() if commits else total
+    print(f"{label:<12} {total:>6} tx {elapsed:>7.3f}s "
+          f"{total / elapsed:>9.0f} tx/sec {committed / elapsed:>9.0f} commits/sec")
+
+
+if __name__ == "__main__":
+    transactions = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 16
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.db")
+        make_db(path)
+
+        def per_call():
+            conn = sqlite3.connect(path, timeout=30)
+            for name, value in PRAGMAS.items():
+                conn.execute(f"PRAGMA {name} = {value}")
+            call = transactional(update_email)
+            return lambda **kwargs: call(conn, **kwargs)
+
+        run("per-call", per_call, transactions, threads, None)
+
+        committer = GroupCommitter(path, pragmas=PRAGMAS)
+        grouped = transactional(update_email, group_commit=committer)
+        run("group", lambda: grouped, transactions, threads,
+            lambda: committer.commits)
+        committer.close()
+        print(committer.stats())
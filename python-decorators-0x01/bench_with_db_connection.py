@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: calls/sec of with_db_connection vs the pooled variant.
+
+Usage:
+    python3 bench_with_db_connection.py [calls] [threads]
+
+Runs get_user_by_id-style lookups against a scratch users.db (created in
+a temporary directory) with the original decorator, which opens and
+closes the database on every call, and with with_pooled_connection in
+thread and bounded mode.
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from db_pool import SQLitePool, with_pooled_connection
+
+with_db_connection = __import__('1-with_db_connection').with_db_connection
+
+
+def make_db(path, rows=10000):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT, "
+                 "email TEXT, age INTEGER)")
+    conn.executemany(
+        "INSERT INTO users (name, email, age) VALUES (?, ?, ?)",
+        [(f"user{i}", f"user{i}@example.com", 18 + i % 80) for i in range(rows)])
+    conn.commit()
+    conn.close()
+
+
+def lookup(conn, user_id):
+    cursor = conn.cursor()
+    cursor.execute("SELECT * FROM users WHERE id = ?", (user_id,))
+    return cursor.fetchone()
+
+
+def run(label, func, calls, threads):
+    per_thread = calls // threads
+
+    def worker():
+        for i in range(per_thread):
+            func(user_id=i % 10000 + 1)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    total = per_thread * threads
+    print(f"{label:<20} {total:>8} calls {elapsed:>7.3f}s "
+          f"{total / elapsed:>10.0f} calls/sec")
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)  # with_db_connection always opens ./users.db
+        make_db("users.db")
+        run("with_db_connection", with_db_connection(lookup), calls, threads)
+        for mode in ("thread", "bounded"):
+            pool = SQLitePool("users.db", size=max(threads, 1), mode=mode)
+            run(f"pooled[{mode}]", with_pooled_connection(pool=pool)(lookup),
+                calls, threads)
+            pool.close()
+        os.chdir(cwd)
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Circuit breaker for database calls.
+
+closed     calls go through; outcomes are counted in a rolling window
+open       once the failure rate in the window reaches failure_rate (after
+           at least min_calls), calls fail fast with CircuitOpenError
+half-open  after open_timeout seconds a few trial calls are let through;
+           a success closes the circuit, a failure opens it again
+
+Put it outside retry_on_failure so a logical call counts once and no
+retries are attempted while the circuit is open:
+
+    @with_db_connection
+    @circuit_breaker(failure_rate=0.5, open_timeout=5)
+    @retry_on_failure(retries=3, delay=0.1)
+    def fetch_users(conn):
+        ...
+"""
+import functools
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling through while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    - failure_rate: fraction of failed calls in the window that opens it
+    - window: length of the rolling window in seconds
+    - min_calls: calls needed in the window before the rate is trusted
+    - open_timeout: seconds to stay open before trying half-open
+    - half_open_calls: trial calls allowed at once while half-open
+    - is_failure: which exceptions count as failures (default: all)
+    """
+
+    def __init__(self, name="users.db", failure_rate=0.5, window=10.0,
+                 min_calls=10, open_timeout=5.0, half_open_calls=1,
+                 is_failure=None, buckets=10):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.window = window
+        self.min_calls = min_calls
+        self.open_timeout = open_timeout
+        self.half_open_calls = half_open_calls
+        self.is_failure = is_failure or (lambda exc: True)
+        self._bucket_width = window / buckets
+        self._buckets = [[0, 0, 0] for _ in range(buckets)]  # epoch, calls, failures
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self.rejected = 0
+        self.transitions = []
+
+    def _bucket(self, now):
+        epoch = int(now / self._bucket_width)
+        bucket = self._buckets[epoch % len(self._buckets)]
+        if bucket[0] != epoch:
+            bucket[:] = [epoch, 0, 0]
+        return bucket
+
+    def _window_counts(self, now):
+        oldest = int(now / self._bucket_width) - len(self._buckets) + 1
+        calls = failures = 0
+        for epoch, bucket_calls, bucket_failures in self._buckets:
+            if epoch >= oldest:
+                calls += bucket_calls
+                failures += bucket_failures
+        return calls, failures
+
+    def _set_state(self, state, now):
+        self._state = state
+        self.transitions.append((now, state))
+        del self.transitions[:-20]
+        if state == OPEN:
+            self._opened_at = now
+        elif state == CLOSED:
+            for bucket in self._buckets:
+                bucket[:] = [0, 0, 0]
+        self._trials = 0
+
+    @property
+    def state(self):
+        """Current state, moving open to half-open once the timeout passed."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == OPEN and now - self._opened_at >= self.open_timeout:
+                self._set_state(HALF_OPEN, now)
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through."""
+        state = self.state
+        with self._lock:
+            if state == OPEN or (state == HALF_OPEN
+                                 and self._trials >= self.half_open_calls):
+                self.rejected += 1
+                raise CircuitOpenError(f"Circuit for {self.name} is {state}")
+            if state == HALF_OPEN:
+                self._trials += 1
+
+    def on_success(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                self._set_state(CLOSED, now)
+            self._bucket(now)[1] += 1
+
+    def on_failure(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._state == HALF_OPEN:
+                self._set_state(OPEN, now)
+                return
+            bucket = self._bucket(now)
+            bucket[1] += 1
+            bucket[2] += 1
+            calls, failures = self._window_counts(now)
+            if self._state == CLOSED and calls >= self.min_calls \
+                    and failures / calls >= self.failure_rate:
+                self._set_state(OPEN, now)
+
+    def release_trial(self):
+        """Give back a half-open trial slot whose call ended without a verdict."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials:
+                self._trials -= 1
+
+    def snapshot(self):
+        """Inspectable state: current state, window counts, rejections."""
+        state = self.state
+        with self._lock:
+            calls, failures = self._window_counts(time.monotonic())
+            return {"name": self.name, "state": state,
+                    "window_calls": calls, "window_failures": failures,
+                    "rejected": self.rejected,
+                    "transitions": list(self.transitions)}
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            self.before_call()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if self.is_failure(e):
+                    self.on_failure()
+                else:
+                    self.on_success()
+                raise
+            except BaseException:
+                # KeyboardInterrupt, SystemExit, ...: says nothing about the
+                # database, but must not keep the half-open slot forever
+                self.release_trial()
+                raise
+            self.on_success()
+            return result
+        wrapper.breaker = self
+        return wrapper
+
+
+def circuit_breaker(breaker=None, **options):
+    """
+    Decorator: @circuit_breaker, @circuit_breaker(failure_rate=0.5, ...) or
+    @circuit_breaker(shared_breaker) to share one circuit between functions.
+    The breaker is available as func.breaker.
+    """
+    if callable(breaker) and not isinstance(breaker, CircuitBreaker):
+        return CircuitBreaker(**options)(breaker)  # bare @circuit_breaker
+    return breaker if breaker is not None else CircuitBreaker(**options)
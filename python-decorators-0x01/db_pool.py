@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Pool of warmed SQLite connections and a pooled with_db_connection.
+
+Opening users.db on every call means re-reading the schema and starting
+with a cold page cache each time. A pool keeps connections open, tuned
+with PRAGMAs, and hands them out again:
+
+- mode="thread": one connection per thread (no locking, no waiting)
+- mode="bounded": at most `size` connections shared by all threads;
+  callers wait up to `timeout` seconds for a free one
+
+Connections are reset when returned (open transactions rolled back) and
+reopened once they are older than max_lifetime seconds. In thread mode a
+nested checkout on the same thread shares the outer one's connection, so
+only the outermost release resets it; a thread's connection is closed
+when the thread ends.
+"""
+import functools
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+
+DEFAULT_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,       # negative means KiB rather than pages
+    "mmap_size": 268435456,     # 256 MiB
+    "temp_store": "MEMORY",
+}
+
+
+class SQLitePool:
+    """Pool of SQLite connections to one database file."""
+
+    def __init__(self, database="users.db", size=5, mode="thread",
+                 timeout=30.0, max_lifetime=3600, pragmas=None,
+                 cached_statements=256):
+        if mode not in ("thread", "bounded"):
+            raise ValueError(f"Unknown pool mode: {mode}")
+        self.database = database
+        self.size = size
+        self.mode = mode
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.pragmas = DEFAULT_PRAGMAS if pragmas is None else pragmas
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._holders = weakref.WeakSet()
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open = 0
+        self._created_at = {}
+        self.checkouts = 0
+        self.connects = 0
+        self.recycled = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.database, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        conn.execute("SELECT count(*) FROM sqlite_master").fetchone()  # load schema
+        self._created_at[id(conn)] = time.monotonic()
+        with self._lock:
+            self.connects += 1
+        return conn
+
+    def _expired(self, conn):
+        if self.max_lifetime is None:
+            return False
+        age = time.monotonic() - self._created_at.get(id(conn), 0)
+        return age > self.max_lifetime
+
+    def _close(self, conn):
+        self._created_at.pop(id(conn), None)
+        conn.close()
+
+    def _reset(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        conn.row_factory = None
+        conn.set_trace_callback(None)
+
+    def acquire(self):
+        """Check a connection out of the pool."""
+        with self._lock:
+            self.checkouts += 1
+        if self.mode == "thread":
+            holder = getattr(self._local, "holder", None)
+            if holder is not None and not holder.finalizer.alive:
+                holder = None  # closed by close()
+            if holder is not None and not holder.depth and self._expired(holder.conn):
+                holder.finalizer()
+                with self._lock:
+                    self.recycled += 1
+                holder = None
+            if holder is None:
+                holder = self._local.holder = _ThreadConnection(self, self._connect())
+                self._holders.add(holder)
+            holder.depth += 1
+            return holder.conn
+
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                if self._open < self.size:
+                    self._open += 1
+                    create = True
+                else:
+                    create = False
+            if create:
+                try:
+                    return self._connect()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+            try:
+                conn = self._idle.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError(
+                    f"No connection to {self.database} within {self.timeout}s")
+        if self._expired(conn):
+            self._close(conn)
+            with self._lock:
+                self.recycled += 1
+            conn = self._connect()
+        return conn
+
+    def release(self, conn):
+        """Reset a connection and make it available again."""
+        if self.mode == "thread":
+            holder = getattr(self._local, "holder", None)
+            if holder is None or holder.conn is not conn:
+                return
+            holder.depth -= 1
+            if holder.depth:
+                return  # a nested checkout; the outer one still uses it
+            try:
+                self._reset(conn)
+            except sqlite3.Error:
+                self._local.holder = None
+                holder.finalizer()
+            return
+
+        try:
+            self._reset(conn)
+        except sqlite3.Error:
+            self._close(conn)
+            conn = self._connect()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and back in."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """
+        Close idle connections. In thread mode this closes every thread's
+        connection, so only call it once those threads are done with it.
+        """
+        self._local.holder = None
+        for holder in list(self._holders):
+            holder.finalizer()
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                break
+            with self._lock:
+                self._open -= 1
+
+    def stats(self):
+        """Checkout and connect counters."""
+        with self._lock:
+            return {"mode": self.mode, "checkouts": self.checkouts,
+                    "connects": self.connects, "recycled": self.recycled,
+                    "idle": self._idle.qsize()}
+
+
+class _ThreadConnection:
+    """
+    A thread's connection in thread mode, with its checkout depth. It lives
+    in the pool's threading.local, so it is collected when the thread
+    ends and the finalizer closes the connection.
+    """
+
+    def __init__(self, pool, conn):
+        self.conn = conn
+        self.depth = 0
+        self.finalizer = weakref.finalize(self, pool._close, conn)
+
+
+#### process-wide pool for users.db, created on first use
+_default_pool = None
+_default_lock = threading.Lock()
+
+
+def get_default_pool():
+    """Return the shared users.db pool (thread mode)."""
+    global _default_pool
+    with _default_lock:
+        if _default_pool is None:
+            _default_pool = SQLitePool("users.db")
+        return _default_pool
+
+
+def with_pooled_connection(func=None, *, pool=None):
+    """
+    Pooled variant of with_db_connection: passes a pooled connection as
+    the first argument instead of opening and closing users.db per call.
+    Use as @with_pooled_connection or @with_pooled_connection(pool=...).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            source = pool if pool is not None else get_default_pool()
+            with source.connection() as conn:
+                return func(conn, *args, **kwargs)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Query profiler: where does database time go?
+
+profile_queries groups executions by query fingerprint (literals stripped,
+see sql_text.fingerprint) and keeps, per group, a call count, rows
+returned, errors and an HDR-style latency histogram for p50/p95/p99. For
+the slowest few executions of each group it captures the EXPLAIN QUERY
+PLAN output, which shows whether SQLite scanned a whole table or used an
+index.
+
+It needs the connection, so put it under with_db_connection:
+
+    @log_queries
+    @with_db_connection
+    @profile_queries
+    def fetch(conn, query, params=()):
+        ...
+
+    print(default_profiler.report())
+"""
+import functools
+import heapq
+import json
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+
+from sql_text import fingerprint
+from tracing import result_rows
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of latencies in microseconds. Every power of two
+    is split into 2**significant_bits sub-buckets, which bounds the
+    relative error of a percentile to about 2**-(significant_bits - 1).
+    """
+
+    def __init__(self, significant_bits=7):
+        self.bits = significant_bits
+        self._counts = defaultdict(int)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def _index(self, micros):
+        if micros < (1 << self.bits):
+            return micros
+        shift = micros.bit_length() - self.bits
+        return (shift << self.bits) | (micros >> shift)
+
+    def _value(self, index):
+        shift = index >> self.bits
+        mantissa = index & ((1 << self.bits) - 1)
+        if shift == 0:
+            return mantissa
+        return (mantissa << shift) + (1 << (shift - 1))  # bucket midpoint
+
+    def record(self, seconds):
+        """Add one latency, in seconds."""
+        micros = max(0, int(seconds * 1_000_000))
+        self._counts[self._index(micros)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, p):
+        """Latency in seconds at percentile p (0-100)."""
+        if not self.count:
+            return None
+        target = max(1, round(p / 100 * self.count))
+        seen = 0
+        for index in sorted(self._counts):
+            seen += self._counts[index]
+            if seen >= target:
+                return min(self._value(index) / 1_000_000, self.max)
+        return self.max
+
+
+class _Group:
+    def __init__(self, fingerprint_text, keep_slowest):
+        self.fingerprint = fingerprint_text
+        self.keep_slowest = keep_slowest
+        self.calls = 0
+        self.errors = 0
+        self.rows = 0
+        self.histogram = LatencyHistogram()
+        self.slowest = []  # min-heap of (duration, sequence, query, plan)
+
+
+class QueryProfiler:
+    """Per-fingerprint latency statistics, thread-safe."""
+
+    def __init__(self, keep_slowest=3):
+        self.keep_slowest = keep_slowest
+        self._groups = {}
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def _group(self, query):
+        key = fingerprint(query)
+        group = self._groups.get(key)
+        if group is None:
+            group = self._groups[key] = _Group(key, self.keep_slowest)
+        return group
+
+    def is_slow_sample(self, query, duration):
+        """True if duration would enter the slowest samples of its group."""
+        with self._lock:
+            group = self._groups.get(fingerprint(query))  # don't create it yet
+            return (group is None
+                    or len(group.slowest) < group.keep_slowest
+                    or duration > group.slowest[0][0])
+
+    def record(self, query, duration, rows, error=False, plan=None):
+        """Add one execution."""
+        with self._lock:
+            group = self._group(query)
+            group.calls += 1
+            group.rows += rows
+            group.errors += 1 if error else 0
+            group.histogram.record(duration)
+            if plan is not None:
+                self._sequence += 1
+                sample = (duration, self._sequence, query, plan)
+                if len(group.slowest) < group.keep_slowest:
+                    heapq.heappush(group.slowest, sample)
+                elif duration > group.slowest[0][0]:
+                    heapq.heapreplace(group.slowest, sample)
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self._groups.clear()
+
+    def snapshot(self):
+        """JSON-serializable statistics, hottest (most total time) first."""
+        with self._lock:
+            groups = list(self._groups.values())
+            result = []
+            for group in groups:
+                hist = group.histogram
+                slowest = sorted(group.slowest, reverse=True)
+                result.append({
+                    "fingerprint": group.fingerprint,
+                    "calls": group.calls,
+                    "errors": group.errors,
+                    "rows": group.rows,
+                    "total_ms": hist.total * 1000,
+                    "p50_ms": hist.percentile(50) * 1000,
+                    "p95_ms": hist.percentile(95) * 1000,
+                    "p99_ms": hist.percentile(99) * 1000,
+                    "max_ms": hist.max * 1000,
+                    "full_scan": any(_is_full_scan(plan)
+                                     for _, _, _, plan in slowest),
+                    "slowest": [
+                        {"duration_ms": duration * 1000, "query": query,
+                         "plan": plan}
+                        for duration, _, query, plan in slowest
+                    ],
+                })
+        result.sort(key=lambda item: item["total_ms"], reverse=True)
+        return result
+
+    def to_json(self, **kwargs):
+        """Snapshot as a JSON string."""
+        return json.dumps(self.snapshot(), **kwargs)
+
+    def report(self, limit=20, width=60):
+        """Text table of the hottest fingerprints."""
+        lines = [
+            f"{'fingerprint':<{width}} {'calls':>7} {'total ms':>10} "
+            f"{'p50':>8} {'p95':>8} {'p99':>8} {'rows':>8} scan"
+        ]
+        for item in self.snapshot()[:limit]:
+            text = item["fingerprint"]
+            if len(text) > width:
+                text = text[:width - 3] + "..."
+            lines.append(
+                f"{text:<{width}} {item['calls']:>7} {item['total_ms']:>10.2f} "
+                f"{item['p50_ms']:>8.3f} {item['p95_ms']:>8.3f} "
+                f"{item['p99_ms']:>8.3f} {item['rows']:>8} "
+                f"{'FULL' if item['full_scan'] else ''}")
+        return "\n".join(lines)
+
+
+def _is_full_scan(plan):
+    """A SCAN step without an index reads every row of the table."""
+    return any(step.startswith("SCAN") and "INDEX" not in step
+               for step in plan or ())
+
+
+def explain(conn, query, params=()):
+    """EXPLAIN QUERY PLAN details for query, or [] if it cannot be explained."""
+    try:
+        return [row[-1] for row in
+                conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()]
+    except sqlite3.Error:
+        return []
+
+
+#### process-wide profiler used when none is given
+default_profiler = QueryProfiler()
+
+
+def profile_queries(func=None, *, profiler=None):
+    """
+    Profile a function called as func(conn, query, params=...).
+    Use as @profile_queries or @profile_queries(profiler=QueryProfiler()).
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(conn, *args, **kwargs):
+            query = kwargs.get("query") if "query" in kwargs else args[0] if args else None
+            if not isinstance(query, str):
+                return func(conn, *args, **kwargs)
+            params = kwargs.get("params") if "params" in kwargs else args[1] if len(args) > 1 else ()
+            target = profiler or default_profiler
+
+            result, error = None, False
+            start = time.perf_counter()
+            try:
+                result = func(conn, *args, **kwargs)
+                return result
+            except Exception:
+                error = True
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                plan = None
+                if target.is_slow_sample(query, duration):
+                    plan = explain(conn, query, params or ())
+                target.record(query, duration, result_rows(result), error, plan)
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
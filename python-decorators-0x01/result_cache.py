@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Bounded query result cache used by cache_query.
+
+Entries are keyed by normalized SQL plus bound parameters, evicted in LRU
+order once max_entries or max_bytes is exceeded, expire after a TTL and are
+dropped when a write to one of the tables they read is committed (see
+transactional in 2-transactional.py).
+
+The cache is thread-safe. get_or_compute runs at most one computation per
+key at a time (single flight): concurrent callers missing the same key wait
+for the first one instead of all hitting the database. With a stale_ttl,
+expired entries are served for a while longer and refreshed in a background
+thread (stale-while-revalidate).
+"""
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from sql_text import normalize_sql, referenced_tables, written_tables
+
+
+def _freeze(params):
+    """Turn bound parameters into something hashable."""
+    if params is None:
+        return ()
+    if isinstance(params, dict):
+        return tuple(sorted(params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(params)
+    return (params,)
+
+
+def _size_of(value):
+    try:
+        return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class _Entry:
+    __slots__ = ("value", "size", "fresh_until", "stale_until", "tables")
+
+    def __init__(self, value, size, fresh_until, stale_until, tables):
+        self.value = value
+        self.size = size
+        self.fresh_until = fresh_until
+        self.stale_until = stale_until
+        self.tables = tables
+
+
+class _Flight:
+    """A computation in progress that other callers can wait on."""
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def resolve(self, value=None, error=None):
+        self.value, self.error = value, error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache of query results.
+
+    - max_entries: most entries kept (None for no limit)
+    - max_bytes: most pickled bytes kept (None for no limit)
+    - ttl: default seconds an entry stays fresh (None for no expiry)
+    - stale_ttl: default seconds an expired entry may still be served
+      while it is refreshed in the background (None to disable)
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None, ttl=None,
+                 stale_ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._by_table = defaultdict(set)
+        self._inflight = {}
+        self._refreshing = set()
+        self._generation = 0
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(query, params=None):
+        """Cache key for a query and its parameters."""
+        return normalize_sql(query), _freeze(params)
+
+    def _lookup(self, key):
+        """Return ("fresh" | "stale" | "miss", entry). Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return "miss", None
+        now = time.monotonic()
+        if entry.fresh_until is None or now < entry.fresh_until:
+            self._entries.move_to_end(key)
+            return "fresh", entry
+        if entry.stale_until is not None and now < entry.stale_until:
+            self._entries.move_to_end(key)
+            return "stale", entry
+        self._remove(key)
+        self.expirations += 1
+        return "miss", None
+
+    def get(self, key):
+        """Return (True, value) on a fresh hit, (False, None) otherwise."""
+        with self._lock:
+            state, entry = self._lookup(key)
+            if state == "fresh":
+                self.hits += 1
+                return True, entry.value
+            self.misses += 1
+            return False, None
+
+    @property
+    def generation(self):
+        """Bumped by every invalidation; see set(generation=...)."""
+        return self._generation
+
+    def set(self, key, value, ttl=None, stale_ttl=None, generation=None):
+        """
+        Store value under key; tables are taken from the query text. With
+        generation (read before running the query), the value is dropped
+        if an invalidation happened in between.
+        """
+        self._insert(key, self._prepare(key, value, ttl, stale_ttl), generation)
+
+    def _prepare(self, key, value, ttl, stale_ttl):
+        """Build the entry for value; done outside the lock (may pickle)."""
+        ttl = self.ttl if ttl is None else ttl
+        stale_ttl = self.stale_ttl if stale_ttl is None else stale_ttl
+        size = _size_of(value) if self.max_bytes is not None else 0
+        now = time.monotonic()
+        fresh_until = now + ttl if ttl is not None else None
+        stale_until = (fresh_until + stale_ttl
+                       if fresh_until is not None and stale_ttl else None)
+        return _Entry(value, size, fresh_until, stale_until,
+                      referenced_tables(key[0]))
+
+    def _insert(self, key, entry, generation=None):
+        """Store a prepared entry unless generation is out of date."""
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+            if key in self._entries:
+                self._remove(key)
+            if self.max_bytes is not None and entry.size > self.max_bytes:
+                return False
+            self._entries[key] = entry
+            self._bytes += entry.size
+            for table in entry.tables:
+                self._by_table[table].add(key)
+            self._evict()
+            return True
+
+    def get_or_compute(self, key, compute, ttl=None, stale_ttl=None,
+                       refresh=None):
+        """
+        Return the cached value for key, or run compute() once for all
+        concurrent callers and cache its result. When the entry is stale
+        and refresh is given, the stale value is returned right away and
+        refresh() runs in a background thread to replace it.
+        """
+        with self._lock:
+            state, entry = self._lookup(key)
+            if state == "fresh":
+                self.hits += 1
+                return entry.value
+            if state == "stale" and refresh is not None:
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self._refreshing.add(key)
+                    threading.Thread(
+                        target=self._refresh,
+                        args=(key, refresh, ttl, stale_ttl),
+                        daemon=True).start()
+                return entry.value
+            flight = self._inflight.get(key)
+            if flight is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                self.misses += 1
+                flight = self._inflight[key] = _Flight()
+                leader = True
+            generation = self._generation
+
+        if not leader:
+            return flight.wait()
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.resolve(error=e)
+            raise
+        entry = self._prepare(key, value, ttl, stale_ttl)
+        with self._lock:
+            # A write committed meanwhile may have made this result stale
+            self._insert(key, entry, generation)
+            self._inflight.pop(key, None)
+        flight.resolve(value)
+        return value
+
+    def _refresh(self, key, refresh, ttl, stale_ttl):
+        try:
+            with self._lock:
+                generation = self._generation
+            entry = self._prepare(key, refresh(), ttl, stale_ttl)
+            with self._lock:
+                if self._insert(key, entry, generation):
+                    self.refreshes += 1
+        except Exception as e:
+            print(f"[CACHE] Background refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _evict(self):
+        while self._entries and (
+                (self.max_entries is not None
+                 and len(self._entries) > self.max_entries)
+                or (self.max_bytes is not None
+                    and self._bytes > self.max_bytes)):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+        for table in entry.tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def invalidate_tables(self, tables):
+        """Drop every entry that reads any of the given tables."""
+        removed = 0
+        with self._lock:
+            self._generation += 1
+            for table in tables:
+                for key in list(self._by_table.get(table.lower(), ())):
+                    if key in self._entries:
+                        self._remove(key)
+                        removed += 1
+            self.invalidations += removed
+        return removed
+
+    def invalidate_statements(self, statements):
+        """Drop entries reading tables written by the given SQL statements."""
+        tables = set()
+        for statement in statements:
+            tables |= written_tables(statement)
+        return self.invalidate_tables(tables) if tables else 0
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self._by_table.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Hit/miss/eviction counters and current size."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "coalesced": self.coalesced,
+                "refreshes": self.refreshes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+
+#### process-wide cache shared by cache_query and transactional
+default_cache = QueryCache()
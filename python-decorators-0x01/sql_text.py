@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Helpers for looking at SQL text: normalizing, fingerprinting and finding
+the tables a statement reads or writes. Regex based, good enough for the
+single-statement queries used by the decorators.
+"""
+import re
+
+_TOKENS = re.compile(
+    r"'(?:[^']|'')*'"          # string literal
+    r'|"(?:[^"]|"")*"'         # quoted identifier
+    r"|\s+"                    # whitespace
+    r"|[^\s'\"]+"              # anything else
+)
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_IN_LIST = re.compile(r"\bin\s*\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_READ_TABLES = re.compile(r"\b(?:from|join)\s+([\w\"\.]+)", re.IGNORECASE)
+_WRITE_TABLES = re.compile(
+    r"\b(?:insert(?:\s+or\s+\w+)?\s+into|replace\s+into|update(?:\s+or\s+\w+)?"
+    r"|delete\s+from|alter\s+table|drop\s+table(?:\s+if\s+exists)?"
+    r"|create\s+table(?:\s+if\s+not\s+exists)?)\s+([\w\"\.]+)",
+    re.IGNORECASE)
+
+
+def normalize_sql(query):
+    """
+    Collapse whitespace outside of quotes and drop a trailing semicolon,
+    so formatting differences map to the same text.
+    """
+    parts = []
+    for token in _TOKENS.findall(query):
+        parts.append(" " if token.isspace() else token)
+    return "".join(parts).strip().rstrip(";").strip()
+
+
+def fingerprint(query):
+    """
+    Normalized query with literals replaced by ? and IN lists collapsed,
+    so `WHERE id = 1` and `WHERE id = 2` share a fingerprint.
+    """
+    text = _STRING.sub("?", normalize_sql(query))
+    text = _NUMBER.sub("?", text).lower()
+    return _IN_LIST.sub("in (...)", text)
+
+
+def _table_names(pattern, query):
+    return {name.strip('"').lower() for name in pattern.findall(query)}
+
+
+def referenced_tables(query):
+    """Tables a statement reads from or writes to (lowercase)."""
+    return _table_names(_READ_TABLES, query) | written_tables(query)
+
+
+def written_tables(query):
+    """Tables a statement modifies (lowercase)."""
+    return _table_names(_WRITE_TABLES, query)
+
+
+def write_recorder(statements):
+    """
+    Trace callback (for Connection.set_trace_callback) that appends only
+    the statements that modify a table to `statements`.
+    """
+    def record(statement):
+        if written_tables(statement):
+            statements.append(statement)
+    return record
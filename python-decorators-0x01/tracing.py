@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Low-overhead query tracing used by log_queries.
+
+The decorated call only times the query and appends a small tuple to a
+bounded ring buffer (a deque; appends and pops are atomic, so producers
+never take a lock). A background thread drains the buffer, builds the
+records (fingerprint, caller, ...) and writes them as JSON lines. When
+the buffer is full the oldest records are dropped rather than slowing
+the caller down.
+
+Queries slower than slow_threshold are always recorded; the rest are
+sampled at sample_rate.
+"""
+import atexit
+import json
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+
+from sql_text import fingerprint
+
+
+class QueryTracer:
+    """Ring buffer of query records drained to a JSON lines file."""
+
+    def __init__(self, path="query_trace.jsonl", sample_rate=1.0,
+                 slow_threshold=0.1, buffer_size=10000, flush_interval=0.5):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.slow_threshold = slow_threshold
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=buffer_size)
+        self._stop = threading.Event()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+        self._counts = {}  # one [recorded] cell per live producer thread
+        self._retired = 0  # records of producer threads that have ended
+        self._counts_lock = threading.Lock()
+        self.written = 0
+
+    def _count_cell(self):
+        """This thread's counter; only its own thread ever increments it."""
+        holder = getattr(self._local, "holder", None)
+        if holder is None:
+            holder = self._local.holder = _CountHolder(self)
+            with self._counts_lock:  # once per thread, not per query
+                self._counts[id(holder.cell)] = holder.cell
+        return holder.cell
+
+    def _retire(self, cell):
+        """Fold an ended thread's counter into the shared total."""
+        with self._counts_lock:
+            self._counts.pop(id(cell), None)
+            self._retired += cell[0]
+
+    @property
+    def recorded(self):
+        """Records accepted so far, across all threads."""
+        with self._counts_lock:
+            cells = list(self._counts.values())
+            return self._retired + sum(cell[0] for cell in cells)
+
+    def observe(self, query, duration, rows, frame, error=None):
+        """Record one query execution, subject to sampling."""
+        if duration < self.slow_threshold and (
+                self.sample_rate < 1.0 and random.random() >= self.sample_rate):
+            return
+        code = frame.f_code if frame is not None else None
+        self._buffer.append((
+            time.time(), query, duration, rows,
+            code.co_filename if code else None,
+            frame.f_lineno if frame is not None else None,
+            code.co_name if code else None,
+            error,
+        ))
+        self._count_cell()[0] += 1
+        if self._writer is None:
+            self._start()
+
+    def _start(self):
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._run, name="query-trace-writer", daemon=True)
+                self._writer.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            self.drain()
+        self.drain()
+
+    def _format(self, item):
+        timestamp, query, duration, rows, filename, lineno, function, error = item
+        record = {
+            "ts": timestamp,
+            "query": query,
+            "fingerprint": fingerprint(query),
+            "duration_ms": round(duration * 1000, 3),
+            "rows": rows,
+            "slow": duration >= self.slow_threshold,
+            "caller": f"{filename}:{lineno}:{function}" if filename else None,
+        }
+        if error is not None:
+            record["error"] = error
+        return json.dumps(record)
+
+    def drain(self):
+        """Write out everything currently in the buffer."""
+        lines = []
+        while True:
+            try:
+                lines.append(self._format(self._buffer.popleft()))
+            except IndexError:
+                break
+        if lines:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            self.written += len(lines)
+
+    def close(self):
+        """Stop the writer thread after a final drain."""
+        self._stop.set()
+        if self._writer is not None:
+            self._writer.join()
+        else:
+            self.drain()
+
+    def stats(self):
+        """Recorded/written/dropped counters."""
+        recorded = self.recorded
+        pending = len(self._buffer)
+        return {"recorded": recorded, "written": self.written,
+                "pending": pending,
+                "dropped": max(0, recorded - self.written - pending)}
+
+
+class _CountHolder:
+    """
+    A thread's counter cell. It lives in the tracer's threading.local, so
+    it is collected when the thread ends and the finalizer retires the cell.
+    """
+
+    def __init__(self, tracer):
+        self.cell = [0]
+        weakref.finalize(self, tracer._retire, self.cell)
+
+
+#### process-wide tracer, configured from the environment on first use
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """
+    Shared tracer: QUERY_TRACE_PATH (default query_trace.jsonl),
+    QUERY_TRACE_SAMPLE_RATE (default 1.0), QUERY_TRACE_SLOW_MS (default 100).
+    """
+    global _tracer
+    tracer = _tracer
+    if tracer is not None:  # fast path: no lock once created
+        return tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = QueryTracer(
+                path=os.environ.get("QUERY_TRACE_PATH", "query_trace.jsonl"),
+                sample_rate=float(os.environ.get("QUERY_TRACE_SAMPLE_RATE", "1.0")),
+                slow_threshold=float(os.environ.get("QUERY_TRACE_SLOW_MS", "100")) / 1000)
+            atexit.register(_tracer.close)
+        return _tracer
+
+
+def result_rows(result):
+    """Best-effort row count of a query function's return value."""
+    if result is None:
+        return 0
+    if isinstance(result, list):
+        return len(result)
+    return 1
@@ -1,5 +1,5 @@
 #!/usr/bin/python3
-import mysql.connector
+import seed
 
 
 def stream_users():
@@ -8,23 +8,23 @@ def stream_users():
     Yields:
         dict: A dictionary containing user_id, name, email, and age
     """
-    # Connect to ALX_prodev database
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="root",       # change if using another MySQL user
-        password="",       # fill in if you set a MySQL password
-        database="ALX_prodev"
-    )
+    # Runs against the selected backend (MySQL ALX_prodev by default)
+    rows = seed.get_backend().stream(
+        "SELECT user_id, name, email, age FROM user_data", dictionary=True)
 
-    cursor = connection.cursor(dictionary=True)
+    # Single loop: fetch rows one by one
+    for row in rows:
+        yield row
 
-    try:
-        cursor.execute("SELECT user_id, name, email, age FROM user_data")
 
-        # Single loop: fetch rows one by one
-        for row in cursor:
-            yield row
-
-    finally:
-        cursor.close()
-        connection.close()
+def stream_user_rows(prefetch_size=1000):
+    """
+    Generator that streams rows from user_data as tuples with bounded memory.
+    Rows are read through an unbuffered cursor prefetch_size at a time,
+    so peak memory does not depend on the size of the table.
+    Yields:
+        tuple: (user_id, name, email, age)
+    """
+    yield from seed.get_backend().stream(
+        "SELECT user_id, name, email, age FROM user_data",
+        prefetch_size=prefetch_size)
@@ -1,41 +1,70 @@
 #!/usr/bin/python3
-import mysql.connector
+import seed
 
+USER_COLUMNS = ("user_id", "name", "email", "age")
+OPERATORS = ("=", "!=", "<", "<=", ">", ">=", "LIKE", "IN")
 
-def stream_users_in_batches(batch_size):
+
+def build_user_query(columns=None, predicates=()):
     """
-    Generator that streams rows from user_data table in batches.
-    Yields:
-        list[dict]: A batch (list) of user rows as dictionaries
+    Compile a column projection and predicate spec into a SELECT on user_data.
+    predicates is a sequence of (column, operator, value) triples that are
+    ANDed together; values are always passed as parameters.
+    Returns:
+        tuple: (query, params)
     """
-    connection = mysql.connector.connect(
-        host="localhost",
-        user="root",       # adjust if needed
-        password="",       # adjust if needed
-        database="ALX_prodev"
-    )
-    cursor = connection.cursor(dictionary=True)
+    columns = tuple(columns) if columns else USER_COLUMNS
+    for column in columns:
+        if column not in USER_COLUMNS:
+            raise ValueError(f"Unknown column: {column}")
+
+    clauses, params = [], []
+    for column, operator, value in predicates:
+        operator = operator.upper()
+        if column not in USER_COLUMNS:
+            raise ValueError(f"Unknown column: {column}")
+        if operator not in OPERATORS:
+            raise ValueError(f"Unsupported operator: {operator}")
+        if operator == "IN":
+            values = list(value)
+            if not values:
+                raise ValueError("IN needs at least one value")
+            placeholders = ", ".join(["%s"] * len(values))
+            clauses.append(f"{column} IN ({placeholders})")
+            params.extend(values)
+        else:
+            clauses.append(f"{column} {operator} %s")
+            params.append(value)
 
-    try:
-        cursor.execute("SELECT user_id, name, email, age FROM user_data")
+    query = f"SELECT {', '.join(columns)} FROM user_data"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    return query, tuple(params)
 
-        while True:  # Loop #1
-            rows = cursor.fetchmany(batch_size)
-            if not rows:
-                break
-            yield rows
 
-    finally:
-        cursor.close()
-        connection.close()
+def stream_users_in_batches(batch_size, columns=None, predicates=(),
+                            dictionary=True):
+    """
+    Generator that streams rows from user_data table in batches.
+    Only the requested columns of rows matching predicates are fetched,
+    see build_user_query. dictionary=False yields tuples in column order,
+    which skips building a dict per row.
+    Yields:
+        list[dict]: A batch (list) of user rows as dictionaries
+    """
+    query, params = build_user_query(columns, predicates)
+    batches = seed.get_backend().batches(query, params, batch_size, dictionary)
+    for rows in batches:  # Loop #1
+        yield rows
 
 
-def batch_processing(batch_size):
+def batch_processing(batch_size, predicates=(("age", ">", 25),), columns=None):
     """
     Process users in batches and filter those over age 25.
+    The filter is pushed down to the database as a WHERE clause (served
+    by the index on age), so only matching rows cross the wire.
     Returns a generator that yields users (dicts).
     """
-    for batch in stream_users_in_batches(batch_size):  # Loop #2
+    for batch in stream_users_in_batches(batch_size, columns, predicates):  # Loop #2
         for user in batch:  # Loop #3
-            if user["age"] > 25:
-                yield user   # ✅ return control to caller with generator
+            yield user   # ✅ return control to caller with generator
@@ -7,21 +7,53 @@ def paginate_users(page_size, offset):
     Fetch one page of users from user_data with a given page_size and offset.
     Returns a list of dict rows.
     """
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor(dictionary=True)
-    cursor.execute(f"SELECT * FROM user_data LIMIT {page_size} OFFSET {offset}")
-    rows = cursor.fetchall()
-    cursor.close()
-    connection.close()
-    return rows
+    return seed.get_backend().fetch_all(
+        "SELECT * FROM user_data LIMIT %s OFFSET %s", (page_size, offset),
+        dictionary=True)
 
 
-def lazy_paginate(page_size):
+def paginate_users_after(connection, page_size, last_user_id=None):
+    """
+    Fetch one page of users whose user_id sorts after last_user_id.
+    Seeks on the primary key instead of skipping offset rows, so a page
+    deep into the table costs the same as the first one.
+    Returns a list of dict rows ordered by user_id.
+    """
+    return seed.get_backend().paginate(page_size, last_user_id, connection)
+
+
+def lazy_paginate_keyset(page_size):
+    """
+    Generator that lazily paginates through user_data by user_id.
+    Reuses a single connection for the whole walk and remembers the
+    last user_id seen instead of an offset.
+    """
+    last_user_id = None
+    with seed.get_backend().connection() as connection:
+        while True:  # only one loop
+            page = paginate_users_after(connection, page_size, last_user_id)
+            if not page:
+                break
+            yield page
+            last_user_id = page[-1]["user_id"]
+
+
+def lazy_paginate(page_size, mode="offset"):
     """
     Generator that lazily paginates through user_data.
     Only fetches the next page when needed.
     Uses a single loop and yield.
+
+    mode="offset" uses LIMIT/OFFSET (one pool checkout per page).
+    mode="keyset" seeks on user_id over one connection, see
+    lazy_paginate_keyset.
     """
+    if mode == "keyset":
+        yield from lazy_paginate_keyset(page_size)
+        return
+    if mode != "offset":
+        raise ValueError(f"Unknown pagination mode: {mode}")
+
     offset = 0
     while True:  # only one loop
         page = paginate_users(page_size, offset)
@@ -1,4 +1,5 @@
 #!/usr/bin/python3
+import aggregates
 import seed
 
 
@@ -6,16 +7,34 @@ def stream_user_ages():
     """
     Generator that yields user ages one by one from user_data table.
     """
-    connection = seed.connect_to_prodev()
-    cursor = connection.cursor()
-    cursor.execute("SELECT age FROM user_data")
+    for row in seed.get_backend().stream("SELECT age FROM user_data"):  # Loop #1
+        yield row[0]  # row is a tuple like (age,)
 
-    try:
-        for row in cursor:  # Loop #1
-            yield row[0]  # row is a tuple like (age,)
-    finally:
-        cursor.close()
-        connection.close()
+
+def stream_user_age_batches(batch_size=1000):
+    """
+    Generator that yields lists of user ages, batch_size at a time,
+    pulled from the server with fetchmany.
+    """
+    batches = seed.get_backend().batches("SELECT age FROM user_data",
+                                         batch_size=batch_size)
+    for rows in batches:
+        yield [row[0] for row in rows]
+
+
+def compute_age_stats(mode="sql", percentiles=(50, 90, 99), batch_size=1000):
+    """
+    Computes count/sum/mean/min/max/variance/percentiles of user ages.
+    mode="sql" pushes the aggregates to the database; mode="stream" makes one
+    pass over stream_user_age_batches (percentiles are approximate).
+    Returns a dict, see aggregates.stream_aggregate.
+    """
+    if mode == "sql":
+        return aggregates.sql_aggregate(seed.get_backend(), "age", percentiles)
+    if mode == "stream":
+        return aggregates.stream_aggregate(
+            stream_user_age_batches(batch_size), percentiles)
+    raise ValueError(f"Unknown aggregation mode: {mode}")
 
 
 def compute_average_age():
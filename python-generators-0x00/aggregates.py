@@ -0,0 +1,241 @@
+#!/usr/bin/python3
+"""
+Aggregations over user_data columns.
+
+Two ways to get count/sum/mean/min/max/variance/percentiles:
+- sql_aggregate pushes the work to the database (a seed backend).
+- stream_aggregate makes one pass over batches of values (for example
+  from fetchmany) with Welford's algorithm and a t-digest for
+  percentiles. Batches are folded with NumPy when it is installed.
+"""
+import bisect
+import math
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, batches fall back to plain Python
+    np = None
+
+AGGREGATE_COLUMNS = ("age",)
+
+
+class RunningStats:
+    """
+    One-pass count/sum/mean/min/max/variance (Welford, with Chan's
+    formula to fold in whole batches at once).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def update(self, value):
+        """Add a single value."""
+        value = float(value)
+        self.count += 1
+        self.sum += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def update_batch(self, values):
+        """Add a batch of values, vectorised with NumPy when available."""
+        if np is not None:
+            values = np.asarray(values, dtype=float)
+            if not values.size:
+                return
+            count = int(values.size)
+            mean = float(values.mean())
+            m2 = float(((values - mean) ** 2).sum())
+            low, high = float(values.min()), float(values.max())
+        else:
+            values = [float(value) for value in values]
+            if not values:
+                return
+            count = len(values)
+            mean = sum(values) / count
+            m2 = sum((value - mean) ** 2 for value in values)
+            low, high = min(values), max(values)
+        self._merge(count, mean, m2, low, high)
+
+    def merge(self, other):
+        """Fold another RunningStats into this one."""
+        if other.count:
+            self._merge(other.count, other.mean, other.m2, other.min, other.max)
+
+    def _merge(self, count, mean, m2, low, high):
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.sum += mean * count
+        self.count = total
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    @property
+    def variance(self):
+        """Population variance (same as MySQL VAR_POP)."""
+        return self.m2 / self.count if self.count else None
+
+    def as_dict(self):
+        """Return the statistics as a plain dict."""
+        if not self.count:
+            return {"count": 0, "sum": 0, "mean": None, "min": None,
+                    "max": None, "variance": None}
+        return {"count": self.count, "sum": self.sum, "mean": self.mean,
+                "min": self.min, "max": self.max, "variance": self.variance}
+
+
+class TDigest:
+    """
+    Merging t-digest for approximate percentiles in bounded memory.
+    compression bounds the number of centroids kept (roughly 2x it).
+    """
+
+    def __init__(self, compression=100):
+        self.compression = compression
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._means = []
+        self._weights = []
+        self._buffer = []
+        self._buffer_size = compression * 10
+
+    def update(self, value):
+        """Add a single value."""
+        self._buffer.append(float(value))
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def update_batch(self, values):
+        """Add a batch of values."""
+        if np is not None:
+            self._buffer.extend(np.asarray(values, dtype=float).tolist())
+        else:
+            self._buffer.extend(float(value) for value in values)
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        self.min = min(self.min, min(self._buffer))
+        self.max = max(self.max, max(self._buffer))
+        points = sorted(
+            list(zip(self._means, self._weights))
+            + [(value, 1) for value in self._buffer])
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+
+        means, weights = [], []
+        mean, weight = points[0]
+        seen = 0
+        for next_mean, next_weight in points[1:]:
+            q = (seen + weight + next_weight / 2) / total
+            limit = 4 * total * q * (1 - q) / self.compression
+            if weight + next_weight <= max(1, limit):
+                weight += next_weight
+                mean += (next_mean - mean) * next_weight / weight
+            else:
+                means.append(mean)
+                weights.append(weight)
+                seen += weight
+                mean, weight = next_mean, next_weight
+        means.append(mean)
+        weights.append(weight)
+
+        self._means, self._weights = means, weights
+        self.count = total
+
+    def quantile(self, q):
+        """Approximate value at quantile q (0 <= q <= 1)."""
+        self._compress()
+        if not self._means:
+            return None
+        if len(self._means) == 1:
+            return self._means[0]
+
+        target = q * self.count
+        centers = []
+        seen = 0
+        for weight in self._weights:
+            centers.append(seen + weight / 2)
+            seen += weight
+
+        index = bisect.bisect_left(centers, target)
+        if index == 0:
+            left_x, left_y = 0, self.min
+            right_x, right_y = centers[0], self._means[0]
+        elif index == len(centers):
+            left_x, left_y = centers[-1], self._means[-1]
+            right_x, right_y = self.count, self.max
+        else:
+            left_x, left_y = centers[index - 1], self._means[index - 1]
+            right_x, right_y = centers[index], self._means[index]
+        if right_x == left_x:
+            return left_y
+        return left_y + (right_y - left_y) * (target - left_x) / (right_x - left_x)
+
+
+def stream_aggregate(batches, percentiles=(50, 90, 99), compression=100):
+    """
+    One-pass aggregation over an iterable of value batches.
+    Returns a dict with count/sum/mean/min/max/variance and an
+    approximate "percentiles" mapping.
+    """
+    stats = RunningStats()
+    digest = TDigest(compression)
+    for batch in batches:
+        stats.update_batch(batch)
+        digest.update_batch(batch)
+
+    result = stats.as_dict()
+    result["percentiles"] = {
+        p: digest.quantile(p / 100) if stats.count else None
+        for p in percentiles
+    }
+    return result
+
+
+def sql_aggregate(backend, column="age", percentiles=(50, 90, 99)):
+    """
+    Compute the same statistics as stream_aggregate inside the database
+    behind backend (see seed.Backend). Percentiles are exact (nearest
+    rank) and read through an ORDER BY ... LIMIT 1 OFFSET k seek on the
+    column's index.
+    """
+    if column not in AGGREGATE_COLUMNS:
+        raise ValueError(f"Unsupported column: {column}")
+
+    with backend.connection() as connection:
+        count, total, mean, low, high, variance = backend.fetch_one(
+            f"SELECT COUNT({column}), SUM({column}), AVG({column}), "
+            f"MIN({column}), MAX({column}), {backend.variance_sql(column)} "
+            "FROM user_data", connection=connection)
+        result = {
+            "count": count,
+            "sum": float(total) if total is not None else 0,
+            "mean": float(mean) if mean is not None else None,
+            "min": float(low) if low is not None else None,
+            "max": float(high) if high is not None else None,
+            "variance": float(variance) if variance is not None else None,
+            "percentiles": {},
+        }
+        for p in percentiles:
+            if not count:
+                result["percentiles"][p] = None
+                continue
+            offset = round(p / 100 * (count - 1))
+            value, = backend.fetch_one(
+                f"SELECT {column} FROM user_data ORDER BY {column} "
+                "LIMIT 1 OFFSET %s", (offset,), connection=connection)
+            result["percentiles"][p] = float(value)
+    return result
@@ -0,0 +1,153 @@
+#!/usr/bin/python3
+"""
+Async counterparts of the user_data generators (use with `async for`).
+
+Backed by aiomysql with its own connection pool, configured from the same
+PRODEV_* environment variables as seed.db_config. While the consumer works
+on one batch, the next one is already being fetched from the server.
+"""
+import asyncio
+import os
+
+import aiomysql
+
+import seed
+
+USER_QUERY = "SELECT user_id, name, email, age FROM user_data"
+
+_pool = None
+_pool_loop = None
+
+
+async def get_async_pool(**options):
+    """
+    Return the aiomysql pool of the running event loop, creating it on
+    first use. Options are passed to aiomysql.create_pool; minsize and
+    maxsize default to PRODEV_POOL_SIZE and
+    PRODEV_POOL_SIZE + PRODEV_POOL_MAX_OVERFLOW.
+    """
+    global _pool, _pool_loop
+    loop = asyncio.get_running_loop()
+    if _pool is not None and _pool_loop is loop:
+        return _pool
+
+    size = int(os.environ.get("PRODEV_POOL_SIZE", "5"))
+    overflow = int(os.environ.get("PRODEV_POOL_MAX_OVERFLOW", "10"))
+    config = seed.db_config()
+    options.setdefault("minsize", size)
+    options.setdefault("maxsize", size + overflow)
+    options.setdefault("pool_recycle",
+                       int(float(os.environ.get("PRODEV_POOL_RECYCLE", "3600"))))
+    _pool = await aiomysql.create_pool(
+        host=config["host"], port=config["port"], user=config["user"],
+        password=config["password"], db=config["database"],
+        autocommit=True, **options)
+    _pool_loop = loop
+    return _pool
+
+
+async def close_async_pool():
+    """Close the pool of the running event loop, if any."""
+    global _pool, _pool_loop
+    if _pool is not None:
+        _pool.close()
+        await _pool.wait_closed()
+    _pool, _pool_loop = None, None
+
+
+async def _stream_batches(query, params, batch_size, cursor_class):
+    """
+    Async generator that yields fetchmany batches from an unbuffered
+    cursor, fetching batch n+1 while the consumer handles batch n.
+    """
+    pool = await get_async_pool()
+    connection = await pool.acquire()
+    cursor = await connection.cursor(cursor_class)
+    pending = None
+    exhausted = False
+    try:
+        await cursor.execute(query, params)
+        pending = asyncio.ensure_future(cursor.fetchmany(batch_size))
+        while True:
+            rows = await pending
+            if not rows:
+                exhausted = True
+                break
+            pending = asyncio.ensure_future(cursor.fetchmany(batch_size))
+            yield rows
+    finally:
+        if pending is not None and not pending.done():
+            pending.cancel()
+            try:
+                await pending  # let the fetch stop before the socket closes
+            except (asyncio.CancelledError, Exception):
+                pass
+        if exhausted:
+            await cursor.close()
+        else:
+            # Drop the connection rather than draining the unread rows
+            connection.close()
+        await pool.release(connection)
+
+
+async def stream_users(batch_size=1000):
+    """
+    Async generator that yields user_data rows one by one as dicts.
+    """
+    async for batch in _stream_batches(USER_QUERY, None, batch_size,
+                                       aiomysql.SSDictCursor):
+        for row in batch:
+            yield row
+
+
+async def stream_users_in_batches(batch_size, dictionary=True):
+    """
+    Async generator that yields user_data rows in batches (lists of dicts,
+    or tuples with dictionary=False).
+    """
+    cursor_class = aiomysql.SSDictCursor if dictionary else aiomysql.SSCursor
+    async for batch in _stream_batches(USER_QUERY, None, batch_size,
+                                       cursor_class):
+        yield batch
+
+
+async def _fetch_page(connection, page_size, last_user_id):
+    async with connection.cursor(aiomysql.DictCursor) as cursor:
+        if last_user_id is None:
+            await cursor.execute(
+                "SELECT * FROM user_data ORDER BY user_id LIMIT %s",
+                (page_size,))
+        else:
+            await cursor.execute(
+                "SELECT * FROM user_data WHERE user_id > %s "
+                "ORDER BY user_id LIMIT %s",
+                (last_user_id, page_size))
+        return await cursor.fetchall()
+
+
+async def lazy_paginate(page_size):
+    """
+    Async generator that pages through user_data by user_id (keyset) on one
+    connection. The next page is requested before the current one is
+    handed to the consumer.
+    """
+    pool = await get_async_pool()
+    async with pool.acquire() as connection:
+        pending = asyncio.ensure_future(_fetch_page(connection, page_size, None))
+        try:
+            while True:
+                page = await pending
+                if not page:
+                    break
+                pending = asyncio.ensure_future(
+                    _fetch_page(connection, page_size, page[-1]["user_id"]))
+                yield page
+        finally:
+            if not pending.done():
+                pending.cancel()
+                try:
+                    await pending
+                except asyncio.CancelledError:
+                    pass
+                # A query cut off mid-read leaves the protocol out of sync
+                connection.close()
@@ -0,0 +1,75 @@
+#!/usr/bin/python3
+"""
+Benchmark async_stream against the blocking generators under concurrency.
+
+Usage:
+    python3 bench_async.py [consumers ...]
+
+Each consumer reads max_batches batches of user_data and simulates some
+per-batch work. "sync" runs the blocking stream_users_in_batches in a
+thread per consumer (asyncio.to_thread); "async" uses
+async_stream.stream_users_in_batches on the event loop.
+"""
+import asyncio
+import sys
+import time
+
+import async_stream
+
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+
+BATCH_SIZE = 1000
+MAX_BATCHES = 50
+WORK_SECONDS = 0.002
+
+
+def sync_consumer():
+    rows = 0
+    batches = stream_users_in_batches(BATCH_SIZE, dictionary=False)
+    for count, batch in enumerate(batches, 1):
+        rows += len(batch)
+        time.sleep(WORK_SECONDS)
+        if count == MAX_BATCHES:
+            batches.close()
+            break
+    return rows
+
+
+async def async_consumer():
+    rows = 0
+    batches = async_stream.stream_users_in_batches(BATCH_SIZE, dictionary=False)
+    count = 0
+    async for batch in batches:
+        rows += len(batch)
+        count += 1
+        await asyncio.sleep(WORK_SECONDS)
+        if count == MAX_BATCHES:
+            break
+    await batches.aclose()
+    return rows
+
+
+async def run(mode, consumers):
+    start = time.perf_counter()
+    if mode == "sync":
+        results = await asyncio.gather(
+            *(asyncio.to_thread(sync_consumer) for _ in range(consumers)))
+    else:
+        results = await asyncio.gather(
+            *(async_consumer() for _ in range(consumers)))
+    return sum(results), time.perf_counter() - start
+
+
+async def main(levels):
+    await async_stream.get_async_pool(maxsize=max(levels))
+    print(f"{'consumers':>9} {'mode':>5} {'rows':>10} {'seconds':>8} {'rows/sec':>10}")
+    for consumers in levels:
+        for mode in ("sync", "async"):
+            rows, elapsed = await run(mode, consumers)
+            print(f"{consumers:>9} {mode:>5} {rows:>10} {elapsed:>8.2f} "
+                  f"{rows / elapsed if elapsed else 0:>10.0f}")
+    await async_stream.close_async_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main([int(arg) for arg in sys.argv[1:]] or [1, 4, 16, 64]))
@@ -0,0 +1,95 @@
+#!/usr/bin/python3
+"""
+Generated-data benchmark of every generator against each seed backend.
+
+Usage:
+    python3 bench_backends.py [rows] [backend ...]
+
+Fills user_data with `rows` generated users (default 100000) on each
+backend (default: sqlite and mysql), then drains every generator and
+prints rows/sec. Backends that cannot be reached are skipped, so this
+runs on machines without a MySQL server. The SQLite database goes to
+PRODEV_SQLITE_PATH (default bench_prodev.db here).
+"""
+import os
+import random
+import sys
+import time
+import uuid
+
+import seed
+
+stream_users = __import__('0-stream_users')
+batch_processing = __import__('1-batch_processing')
+lazy_paginate = __import__('2-lazy_paginate')
+stream_ages = __import__('4-stream_ages')
+partition_scan = __import__('partition_scan')
+
+BATCH_SIZE = 1000
+
+
+def generate_users(count, seed_value=0):
+    """Generator of (user_id, name, email, age) tuples."""
+    rng = random.Random(seed_value)
+    for index in range(count):
+        user_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        yield (user_id, f"User {index}", f"user{index}@example.com",
+               rng.randint(18, 100))
+
+
+def count_rows(rows):
+    return sum(1 for _ in rows)
+
+
+def count_batches(batches):
+    return sum(len(batch) for batch in batches)
+
+
+GENERATORS = [
+    ("stream_users", lambda: count_rows(stream_users.stream_users())),
+    ("stream_user_rows", lambda: count_rows(stream_users.stream_user_rows())),
+    ("stream_users_in_batches", lambda: count_batches(
+        batch_processing.stream_users_in_batches(BATCH_SIZE))),
+    ("batch_processing", lambda: count_rows(
+        batch_processing.batch_processing(BATCH_SIZE))),
+    ("lazy_paginate[offset]", lambda: count_batches(
+        lazy_paginate.lazy_paginate(BATCH_SIZE))),
+    ("lazy_paginate[keyset]", lambda: count_batches(
+        lazy_paginate.lazy_paginate(BATCH_SIZE, mode="keyset"))),
+    ("stream_user_ages", lambda: count_rows(stream_ages.stream_user_ages())),
+    ("compute_age_stats[sql]", lambda: stream_ages.compute_age_stats("sql")["count"]),
+    ("compute_age_stats[stream]", lambda: stream_ages.compute_age_stats("stream")["count"]),
+    ("stream_users_parallel", lambda: count_rows(
+        partition_scan.stream_users_parallel(4, BATCH_SIZE))),
+]
+
+
+def prepare(backend, rows):
+    """Create the schema and load generated users; returns load seconds."""
+    backend.create_schema()
+    start = time.perf_counter()
+    backend.bulk_insert(generate_users(rows))
+    return time.perf_counter() - start
+
+
+def run(backend_name, rows):
+    try:
+        backend = seed.use_backend(backend_name)
+        load_time = prepare(backend, rows)
+    except Exception as e:
+        print(f"[{backend_name}] skipped: {e}")
+        return
+    print(f"[{backend_name}] loaded {rows} rows in {load_time:.2f}s")
+    for name, generator in GENERATORS:
+        start = time.perf_counter()
+        count = generator()
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<26} rows={count:>9} {elapsed:>7.3f}s "
+              f"{count / elapsed if elapsed else 0:>12.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    os.environ.setdefault("PRODEV_SQLITE_PATH", "bench_prodev.db")
+    row_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    for name in sys.argv[2:] or ["sqlite", "mysql"]:
+        run(name, row_count)
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+"""
+Benchmark pushed-down age filtering against filtering in Python.
+
+Usage:
+    python3 bench_batch_processing.py [batch_size] [age ...]
+
+For each age threshold, batch_processing is run once with the predicate
+pushed down to MySQL and once fetching every row and filtering in
+Python, which is what batch_processing used to do. Fewer matching rows
+(higher thresholds) should widen the gap.
+"""
+import sys
+import time
+
+import seed
+
+batch_module = __import__('1-batch_processing')
+
+
+def python_filter(batch_size, age):
+    """Original approach: fetch all rows, drop non-matching ones in Python."""
+    for batch in batch_module.stream_users_in_batches(batch_size):
+        for user in batch:
+            if user["age"] > age:
+                yield user
+
+
+def pushed_down(batch_size, age):
+    """Predicate compiled into the WHERE clause."""
+    return batch_module.batch_processing(batch_size, (("age", ">", age),))
+
+
+def run(users):
+    """Drain a generator, returning (row_count, elapsed seconds)."""
+    start = time.perf_counter()
+    count = sum(1 for _ in users)
+    return count, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    ages = [int(arg) for arg in sys.argv[2:]] or [0, 25, 50, 75, 95, 99]
+
+    connection = seed.connect_to_prodev()
+    seed.create_age_index(connection)
+    connection.close()
+
+    print(f"{'age >':>6} {'rows':>10} {'python (s)':>11} {'pushdown (s)':>13}")
+    for age in ages:
+        rows, python_time = run(python_filter(batch_size, age))
+        _, pushdown_time = run(pushed_down(batch_size, age))
+        print(f"{age:>6} {rows:>10} {python_time:>11.3f} {pushdown_time:>13.3f}")
@@ -0,0 +1,56 @@
+#!/usr/bin/python3
+"""
+Benchmark page latency of lazy_paginate in offset mode vs keyset mode.
+
+Usage:
+    python3 bench_lazy_paginate.py [page_size] [max_pages] [buckets]
+
+For each mode the table is walked page by page and the time to produce
+every page is recorded. Pages are grouped into buckets by depth so you
+can see latency grow with the offset in offset mode and stay flat in
+keyset mode.
+"""
+import sys
+import time
+
+lazy_paginate = __import__('2-lazy_paginate').lazy_paginate
+
+
+def time_pages(mode, page_size, max_pages):
+    """Return a list of per-page latencies (seconds) for the given mode."""
+    latencies = []
+    pages = lazy_paginate(page_size, mode=mode)
+    try:
+        while len(latencies) < max_pages:
+            start = time.perf_counter()
+            try:
+                next(pages)
+            except StopIteration:
+                break
+            latencies.append(time.perf_counter() - start)
+    finally:
+        pages.close()
+    return latencies
+
+
+def report(mode, latencies, page_size, buckets):
+    """Print average page latency per depth bucket."""
+    if not latencies:
+        print(f"{mode}: no pages returned")
+        return
+    size = max(1, len(latencies) // buckets)
+    print(f"{mode}: {len(latencies)} pages of {page_size} rows")
+    for start in range(0, len(latencies), size):
+        chunk = latencies[start:start + size]
+        avg_ms = sum(chunk) / len(chunk) * 1000
+        print(f"  rows {start * page_size:>10} - "
+              f"{(start + len(chunk)) * page_size:>10}: {avg_ms:8.3f} ms/page")
+
+
+if __name__ == "__main__":
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    max_pages = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    buckets = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    for mode in ("offset", "keyset"):
+        report(mode, time_pages(mode, page_size, max_pages), page_size, buckets)
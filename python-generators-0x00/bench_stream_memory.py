@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+"""
+Memory profile of streaming user_data rows.
+
+Usage:
+    python3 bench_stream_memory.py [row_count ...]
+
+Every (mode, row_count) pair runs in a fresh interpreter that streams
+row_count rows and reports its peak RSS, so the numbers do not leak
+into each other. Mode "stream" reads stream_user_rows (unbuffered
+cursor, tuple rows, prefetch_size at a time) and peak RSS should stay
+flat as row_count grows; mode "dict" is the original unbuffered
+dictionary cursor of stream_users for comparison.
+"""
+import resource
+import subprocess
+import sys
+import time
+from itertools import islice
+
+import seed
+
+stream_user_rows = __import__('0-stream_users').stream_user_rows
+
+QUERY = "SELECT user_id, name, email, age FROM user_data LIMIT %s"
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process in KiB (Linux semantics)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def consume(mode, row_count, prefetch_size):
+    """Stream row_count rows in the given mode and return the row count."""
+    count = 0
+    if mode == "stream":
+        rows = stream_user_rows(prefetch_size=prefetch_size)
+        for _ in islice(rows, row_count):
+            count += 1
+        rows.close()
+        return count
+    connection = seed.connect_to_prodev()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(QUERY, (row_count,))
+        for _ in cursor:
+            count += 1
+        cursor.close()
+    finally:
+        connection.close()
+    return count
+
+
+def child(mode, row_count, prefetch_size):
+    """Entry point of the measuring subprocess."""
+    before = peak_rss_kb()
+    start = time.perf_counter()
+    count = consume(mode, row_count, prefetch_size)
+    elapsed = time.perf_counter() - start
+    print(f"{mode:>6} rows={count:>10} peak_rss={peak_rss_kb():>8} KiB "
+          f"(+{peak_rss_kb() - before} KiB) {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        sys.exit(0)
+
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for mode in ("dict", "stream"):
+        for row_count in counts:
+            subprocess.run([sys.executable, __file__, "--child",
+                            mode, str(row_count), "1000"], check=True)
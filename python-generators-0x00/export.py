@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+"""
+Columnar export of user_data to Parquet or Feather (Arrow IPC).
+
+Rows are pulled as tuples through stream_users_in_batches and every
+fetchmany batch becomes one Arrow record batch, written out before the
+next one is fetched, so memory stays bounded by batch_size. Requires
+pyarrow (pip install pyarrow).
+
+Usage:
+    python3 export.py users.parquet
+    python3 export.py users.feather
+"""
+import os
+import sys
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional for the rest of the project
+    pa = None
+
+stream_users_in_batches = __import__('1-batch_processing').stream_users_in_batches
+
+USER_COLUMNS = ("user_id", "name", "email", "age")
+FORMATS = {".parquet": "parquet", ".feather": "feather", ".arrow": "feather"}
+
+
+def _require_arrow():
+    if pa is None:
+        raise ImportError("Columnar export needs pyarrow: pip install pyarrow")
+
+
+def user_schema():
+    """Arrow schema of user_data (age is MySQL DECIMAL(10,0))."""
+    _require_arrow()
+    return pa.schema([
+        ("user_id", pa.string()),
+        ("name", pa.string()),
+        ("email", pa.string()),
+        ("age", pa.decimal128(10, 0)),
+    ])
+
+
+def _format_of(path, file_format):
+    if file_format:
+        return file_format
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot infer export format from {path}")
+    return FORMATS[extension]
+
+
+def user_record_batches(batch_size=10000):
+    """
+    Generator that yields one Arrow record batch per fetchmany batch.
+    """
+    schema = user_schema()
+    for rows in stream_users_in_batches(batch_size, USER_COLUMNS,
+                                        dictionary=False):
+        columns = list(zip(*rows))
+        yield pa.record_batch(
+            [pa.array(column, type=field.type)
+             for column, field in zip(columns, schema)],
+            schema=schema)
+
+
+def export_users(path, file_format=None, batch_size=10000, compression=None):
+    """
+    Stream user_data into a Parquet or Feather file.
+    file_format is "parquet" or "feather" (inferred from the extension
+    when omitted). Feather files are written uncompressed by default so
+    read_export can memory-map them without copying.
+    Returns the number of rows written.
+    """
+    file_format = _format_of(path, file_format)
+    schema = user_schema()
+    rows = 0
+    if file_format == "parquet":
+        writer = pq.ParquetWriter(path, schema,
+                                  compression=compression or "snappy")
+    elif file_format == "feather":
+        options = pa.ipc.IpcWriteOptions(compression=compression)
+        writer = pa.ipc.new_file(path, schema, options=options)
+    else:
+        raise ValueError(f"Unknown export format: {file_format}")
+
+    with writer:
+        for batch in user_record_batches(batch_size):
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    return rows
+
+
+def read_export(path, file_format=None, columns=None):
+    """
+    Load an exported file as an Arrow Table backed by a memory map.
+    Only the requested columns are read.
+    """
+    _require_arrow()
+    file_format = _format_of(path, file_format)
+    if file_format == "parquet":
+        return pq.read_table(path, columns=columns, memory_map=True)
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    return table.select(columns) if columns else table
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "user_data.parquet"
+    start = time.perf_counter()
+    count = export_users(target)
+    elapsed = time.perf_counter() - start
+    print(f"Exported {count} rows to {target} in {elapsed:.2f}s")
+    print(read_export(target).schema)
@@ -0,0 +1,122 @@
+#!/usr/bin/python3
+"""
+Parallel range-partitioned scan of user_data.
+
+The user_id keyspace (UUID strings) is split into N contiguous ranges and
+each range is read by its own worker process over its own connection
+(to whichever seed backend is selected).
+Batches come back through a bounded queue, so a slow consumer applies
+backpressure to the workers instead of letting results pile up in memory.
+Rows arrive in no particular order across ranges.
+"""
+import queue as queue_module
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import Manager
+
+import seed
+
+USER_COLUMNS = "user_id, name, email, age"
+PUT_TIMEOUT = 0.1
+
+
+def user_id_ranges(partitions):
+    """
+    Split the user_id keyspace into `partitions` contiguous ranges.
+    Returns a list of (low, high) pairs of UUID strings where low is
+    inclusive, high is exclusive and None means unbounded. Lowercase
+    UUID strings sort the same way as the 128-bit integers they encode.
+    """
+    if partitions < 1:
+        raise ValueError("partitions must be at least 1")
+    step = 2 ** 128 // partitions
+    bounds = [str(uuid.UUID(int=i * step)) for i in range(1, partitions)]
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def range_batches(low, high, batch_size):
+    """
+    Generator that yields lists of row tuples with low <= user_id < high.
+    """
+    clauses, params = [], []
+    if low is not None:
+        clauses.append("user_id >= %s")
+        params.append(low)
+    if high is not None:
+        clauses.append("user_id < %s")
+        params.append(high)
+    query = f"SELECT {USER_COLUMNS} FROM user_data"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    yield from seed.get_backend().batches(query, tuple(params), batch_size)
+
+
+def _put(results, stop, item):
+    """Put item on the queue unless the consumer has asked us to stop."""
+    while not stop.is_set():
+        try:
+            results.put(item, timeout=PUT_TIMEOUT)
+            return True
+        except queue_module.Full:
+            continue
+    return False
+
+
+def _scan_range(index, low, high, batch_size, results, stop):
+    """Worker: stream one range into the results queue."""
+    try:
+        for batch in range_batches(low, high, batch_size):
+            if not _put(results, stop, ("rows", index, batch)):
+                break
+    finally:
+        _put(results, stop, ("done", index, None))
+
+
+def scan_user_data(partitions=4, batch_size=1000, queue_size=None):
+    """
+    Generator that yields batches (lists of row tuples) of user_data read
+    in parallel by `partitions` worker processes. At most queue_size
+    batches (default 2 per worker) are buffered between the workers
+    and the consumer. A failing worker re-raises its error here.
+    """
+    with Manager() as manager:
+        results = manager.Queue(maxsize=queue_size or partitions * 2)
+        stop = manager.Event()
+        with ProcessPoolExecutor(max_workers=partitions) as pool:
+            futures = [
+                pool.submit(_scan_range, index, low, high, batch_size,
+                            results, stop)
+                for index, (low, high) in enumerate(user_id_ranges(partitions))
+            ]
+            try:
+                remaining = len(futures)
+                while remaining:
+                    kind, index, batch = results.get()
+                    if kind == "done":
+                        futures[index].result()
+                        remaining -= 1
+                    else:
+                        yield batch
+            finally:
+                # Unblock workers still waiting on a full queue
+                stop.set()
+
+
+def stream_users_parallel(partitions=4, batch_size=1000):
+    """
+    Generator that yields user_data rows as (user_id, name, email, age)
+    tuples, see scan_user_data.
+    """
+    for batch in scan_user_data(partitions, batch_size):
+        yield from batch
+
+
+if __name__ == "__main__":
+    for partitions in [int(arg) for arg in sys.argv[1:]] or [1, 2, 4, 8]:
+        start = time.perf_counter()
+        count = sum(len(batch) for batch in scan_user_data(partitions))
+        elapsed = time.perf_counter() - start
+        print(f"partitions={partitions:>2} rows={count} {elapsed:.2f}s "
+              f"({count / elapsed if elapsed else 0:.0f} rows/sec)")
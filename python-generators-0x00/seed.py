@@ -1,19 +1,51 @@
 #!/usr/bin/python3
-import mysql.connector
-from mysql.connector import Error
 import csv
+import os
+import sqlite3
+import threading
+import time
 import uuid
+from collections import deque
+from contextlib import contextmanager
+from itertools import islice
+
+try:
+    import mysql.connector
+    from mysql.connector import Error
+    from mysql.connector.errors import PoolError
+except ImportError:  # SQLite-only setups, see SQLiteBackend
+    mysql = None
+
+    class Error(Exception):
+        """Stand-in for mysql.connector.Error when the driver is missing."""
+
+    class PoolError(Error):
+        """Stand-in for mysql.connector.errors.PoolError."""
+
+DB_NAME = os.environ.get("PRODEV_DB_NAME", "ALX_prodev")
+
+
+def db_config(database=DB_NAME):
+    """
+    Connection settings for the MySQL server, read from the environment:
+    PRODEV_DB_HOST, PRODEV_DB_PORT, PRODEV_DB_USER, PRODEV_DB_PASSWORD.
+    Pass database=None to connect without selecting a database.
+    """
+    config = {
+        "host": os.environ.get("PRODEV_DB_HOST", "localhost"),
+        "port": int(os.environ.get("PRODEV_DB_PORT", "3306")),
+        "user": os.environ.get("PRODEV_DB_USER", "root"),
+        "password": os.environ.get("PRODEV_DB_PASSWORD", "root"),
+    }
+    if database:
+        config["database"] = database
+    return config
 
-DB_NAME = "ALX_prodev"
 
 def connect_db():
     """Connects to the MySQL server (without specifying database)."""
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",          # Change if needed
-            password="root"       # Change if needed
-        )
+        connection = mysql.connector.connect(**db_config(database=None))
         if connection.is_connected():
             return connection
     except Error as e:
@@ -36,12 +68,7 @@ def create_database(connection):
 def connect_to_prodev():
     """Connects directly to the ALX_prodev database."""
     try:
-        connection = mysql.connector.connect(
-            host="localhost",
-            user="root",           # Change if needed
-            password="root",       # Change if needed
-            database=DB_NAME
-        )
+        connection = mysql.connector.connect(**db_config())
         if connection.is_connected():
             return connection
     except Error as e:
@@ -49,6 +76,213 @@ def connect_to_prodev():
     return None
 
 
+class ConnectionPool:
+    """
+    Thread-safe pool of connections to ALX_prodev.
+
+    - size: connections kept open when idle
+    - max_overflow: extra connections opened under load and closed on return
+    - timeout: seconds to wait for a free connection before PoolError
+    - recycle: connections older than this many seconds are reopened
+    - pre_ping: check a connection is alive before handing it out
+
+    stats() reports checkout counts and the time callers spent waiting.
+    """
+
+    def __init__(self, size=5, max_overflow=10, timeout=30.0, recycle=3600,
+                 pre_ping=True, **config):
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.pre_ping = pre_ping
+        self.config = config or db_config()
+        self._idle = deque()
+        self._created_at = {}
+        self._open = 0
+        self._cond = threading.Condition()
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time": 0.0,
+            "connects": 0,
+            "recycled": 0,
+            "invalidated": 0,
+            "timeouts": 0,
+        }
+
+    def _connect(self):
+        connection = mysql.connector.connect(**self.config)
+        self._created_at[id(connection)] = time.monotonic()
+        with self._cond:
+            self._stats["connects"] += 1
+        return connection
+
+    def _discard(self, connection):
+        self._created_at.pop(id(connection), None)
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _usable(self, connection):
+        age = time.monotonic() - self._created_at.get(id(connection), 0)
+        if self.recycle is not None and age > self.recycle:
+            with self._cond:
+                self._stats["recycled"] += 1
+            return False
+        if self.pre_ping and not connection.is_connected():
+            with self._cond:
+                self._stats["invalidated"] += 1
+            return False
+        return True
+
+    def acquire(self):
+        """Check a connection out of the pool, opening one if allowed."""
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        waited = False
+        with self._cond:
+            while True:
+                if self._idle:
+                    connection = self._idle.pop()
+                    break
+                if self._open < self.size + self.max_overflow:
+                    self._open += 1
+                    connection = None
+                    break
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolError(
+                        f"No connection available within {self.timeout}s")
+                waited = True
+                self._cond.wait(remaining)
+            wait_time = time.perf_counter() - start
+            self._stats["checkouts"] += 1
+            self._stats["wait_time"] += wait_time
+            if waited:
+                self._stats["waits"] += 1
+
+        try:
+            if connection is not None and not self._usable(connection):
+                self._discard(connection)
+                connection = None
+            if connection is None:
+                connection = self._connect()
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._cond.notify()
+            raise
+        return connection
+
+    def release(self, connection):
+        """Return a connection, rolling back any open transaction."""
+        try:
+            if connection.unread_result:
+                # Draining a half-read result could mean millions of rows
+                raise Error("unread result on release")
+            if connection.in_transaction:
+                connection.rollback()
+            keep = True
+        except Error:
+            keep = False
+
+        with self._cond:
+            if keep and len(self._idle) < self.size:
+                self._idle.append(connection)
+                connection = None
+            else:
+                self._open -= 1
+            self._cond.notify()
+        if connection is not None:
+            self._discard(connection)
+
+    @contextmanager
+    def connection(self):
+        """Context manager that checks a connection out and back in."""
+        connection = self.acquire()
+        try:
+            yield connection
+        finally:
+            self.release(connection)
+
+    def close(self):
+        """Close every idle connection."""
+        with self._cond:
+            idle, self._idle = list(self._idle), deque()
+            self._open -= len(idle)
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self):
+        """Snapshot of pool counters."""
+        with self._cond:
+            stats = dict(self._stats)
+            stats["idle"] = len(self._idle)
+            stats["in_use"] = self._open - len(self._idle)
+        checkouts = stats["checkouts"]
+        stats["avg_wait_ms"] = (
+            stats["wait_time"] / checkouts * 1000 if checkouts else 0.0)
+        return stats
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _pool_options(options):
+    options.setdefault("size", int(os.environ.get("PRODEV_POOL_SIZE", "5")))
+    options.setdefault(
+        "max_overflow", int(os.environ.get("PRODEV_POOL_MAX_OVERFLOW", "10")))
+    options.setdefault(
+        "timeout", float(os.environ.get("PRODEV_POOL_TIMEOUT", "30")))
+    options.setdefault(
+        "recycle", float(os.environ.get("PRODEV_POOL_RECYCLE", "3600")))
+    return options
+
+
+def configure_pool(**options):
+    """
+    Replace the process-wide pool. Options are ConnectionPool arguments;
+    unset ones come from PRODEV_POOL_SIZE, PRODEV_POOL_MAX_OVERFLOW,
+    PRODEV_POOL_TIMEOUT and PRODEV_POOL_RECYCLE.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        old = _pool if _pool_pid == os.getpid() else None
+        _pool = ConnectionPool(**_pool_options(options))
+        _pool_pid = os.getpid()
+    if old is not None:
+        old.close()
+    return _pool
+
+
+def get_pool():
+    """
+    Return the process-wide pool, creating it on first use.
+    A forked child gets a fresh pool instead of sharing its parent's sockets.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ConnectionPool(**_pool_options({}))
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def pooled_connection():
+    """
+    Borrow a connection from the process-wide pool.
+    Example usage:
+        with pooled_connection() as connection:
+            cursor = connection.cursor()
+    """
+    return get_pool().connection()
+
+
 def create_table(connection):
     """Creates user_data table if it does not exist."""
     try:
@@ -59,7 +293,9 @@ def create_table(connection):
                 name VARCHAR(255) NOT NULL,
                 email VARCHAR(255) NOT NULL,
                 age DECIMAL NOT NULL,
-                INDEX (user_id)
+                INDEX (user_id),
+                UNIQUE INDEX idx_user_data_email (email),
+                INDEX idx_user_data_age (age)
             )
         """)
         connection.commit()
@@ -97,6 +333,115 @@ def insert_data(connection, csv_file):
         cursor.close()
 
 
+def create_email_index(connection):
+    """
+    Adds a unique index on user_data.email if the table does not have one.
+    Tables created before the index was part of create_table need this
+    before bulk_insert_data can deduplicate on email.
+    Returns True if the unique index exists afterwards, False otherwise
+    (e.g. the table already holds duplicate emails).
+    """
+    cursor = None
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE()
+              AND table_name = 'user_data'
+              AND column_name = 'email'
+              AND non_unique = 0
+        """)
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(
+                "ALTER TABLE user_data "
+                "ADD UNIQUE INDEX idx_user_data_email (email)")
+            print("Unique index on user_data.email created")
+        return True
+    except Error as e:
+        print(f"Error creating email index: {e}")
+        return False
+    finally:
+        if cursor is not None:
+            cursor.close()
+
+
+def create_age_index(connection):
+    """
+    Adds a secondary index on user_data.age if the table does not have one,
+    so age predicates pushed down by batch_processing avoid a full scan.
+    """
+    try:
+        cursor = connection.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE()
+              AND table_name = 'user_data'
+              AND column_name = 'age'
+        """)
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(
+                "ALTER TABLE user_data ADD INDEX idx_user_data_age (age)")
+            print("Index on user_data.age created")
+    except Error as e:
+        print(f"Error creating age index: {e}")
+    finally:
+        cursor.close()
+
+
+def read_csv_chunks(csv_file, chunk_size):
+    """
+    Generator that yields lists of (user_id, name, email, age) tuples
+    from the CSV, chunk_size rows at a time.
+    """
+    with open(csv_file, "r", encoding="utf-8") as f:
+        rows = (
+            (str(uuid.uuid4()), row["name"], row["email"], row["age"])
+            for row in csv.DictReader(f)
+        )
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            yield chunk
+
+
+def bulk_insert_data(connection, csv_file, chunk_size=10000):
+    """
+    Bulk loads user_data from CSV in chunks of chunk_size rows.
+    Each chunk is sent with a single executemany INSERT IGNORE and
+    committed on its own; rows whose email already exists are skipped
+    by the unique email index instead of a SELECT per row.
+    Returns the number of rows inserted. Nothing is loaded if the unique
+    email index cannot be created, since INSERT IGNORE would then let
+    duplicates through.
+    """
+    if not create_email_index(connection):
+        print("Bulk insert aborted: user_data.email has no unique index")
+        return 0
+    inserted, read = 0, 0
+    start = time.perf_counter()
+    try:
+        cursor = connection.cursor()
+        for chunk in read_csv_chunks(csv_file, chunk_size):
+            cursor.executemany("""
+                INSERT IGNORE INTO user_data (user_id, name, email, age)
+                VALUES (%s, %s, %s, %s)
+            """, chunk)
+            connection.commit()
+            read += len(chunk)
+            inserted += cursor.rowcount
+        elapsed = time.perf_counter() - start
+        rate = read / elapsed if elapsed else 0
+        print(f"Read {read} rows, inserted {inserted} "
+              f"in {elapsed:.2f}s ({rate:.0f} rows/sec)")
+    except Error as e:
+        connection.rollback()
+        print(f"Error bulk inserting data: {e}")
+    finally:
+        cursor.close()
+    return inserted
+
+
 def stream_users(connection):
     """
     Generator function that yields rows one by one.
@@ -109,3 +454,221 @@ def stream_users(connection):
     for row in cursor:
         yield row
     cursor.close()
+
+
+def _dict_row(cursor, row):
+    """sqlite3 row factory that returns rows as dicts like MySQL's."""
+    return {column[0]: value for column, value in zip(cursor.description, row)}
+
+
+class Backend:
+    """
+    Database operations the generators need, independent of the driver.
+    Queries are written with %s placeholders; sql() adapts them.
+    Rows are tuples unless dictionary=True.
+    """
+
+    name = None
+    insert_verb = "INSERT IGNORE"
+
+    def connection(self):
+        """Context manager yielding a DB-API connection."""
+        raise NotImplementedError
+
+    def cursor(self, connection, dictionary=False):
+        """Open a cursor that returns tuples, or dicts with dictionary=True."""
+        raise NotImplementedError
+
+    def create_schema(self):
+        """Create user_data and its indexes if they do not exist."""
+        raise NotImplementedError
+
+    def sql(self, query):
+        """Adapt a %s-style query to the driver's paramstyle."""
+        return query
+
+    def variance_sql(self, column):
+        """SQL expression for the population variance of column."""
+        return f"AVG({column} * {column}) - AVG({column}) * AVG({column})"
+
+    def _abandon(self, connection, cursor):
+        """Clean up a cursor whose result was not read to the end."""
+        cursor.close()
+
+    def batches(self, query, params=(), batch_size=1000, dictionary=False):
+        """Generator that yields lists of rows, batch_size at a time."""
+        with self.connection() as connection:
+            cursor = self.cursor(connection, dictionary)
+            exhausted = False
+            try:
+                cursor.execute(self.sql(query), params)
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        exhausted = True
+                        break
+                    yield rows
+            finally:
+                if exhausted:
+                    cursor.close()
+                else:
+                    self._abandon(connection, cursor)
+
+    def stream(self, query, params=(), prefetch_size=1000, dictionary=False):
+        """Generator that yields rows one by one, prefetch_size at a time."""
+        for rows in self.batches(query, params, prefetch_size, dictionary):
+            yield from rows
+
+    def fetch_all(self, query, params=(), dictionary=False, connection=None):
+        """Run a query and return all rows, on connection if given."""
+        if connection is None:
+            with self.connection() as connection:
+                return self.fetch_all(query, params, dictionary, connection)
+        cursor = self.cursor(connection, dictionary)
+        try:
+            cursor.execute(self.sql(query), params)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+
+    def fetch_one(self, query, params=(), connection=None):
+        """Run a query and return its first row as a tuple."""
+        rows = self.fetch_all(query, params, connection=connection)
+        return rows[0] if rows else None
+
+    def paginate(self, page_size, last_user_id=None, connection=None):
+        """Return the page of user_data rows (dicts) after last_user_id."""
+        if last_user_id is None:
+            return self.fetch_all(
+                "SELECT * FROM user_data ORDER BY user_id LIMIT %s",
+                (page_size,), dictionary=True, connection=connection)
+        return self.fetch_all(
+            "SELECT * FROM user_data WHERE user_id > %s "
+            "ORDER BY user_id LIMIT %s",
+            (last_user_id, page_size), dictionary=True, connection=connection)
+
+    def bulk_insert(self, rows, chunk_size=10000):
+        """
+        Insert (user_id, name, email, age) tuples with one executemany per
+        chunk, skipping duplicate emails. Returns the number inserted.
+        """
+        query = self.sql(
+            f"{self.insert_verb} INTO user_data (user_id, name, email, age) "
+            "VALUES (%s, %s, %s, %s)")
+        rows = iter(rows)
+        inserted = 0
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            try:
+                while True:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    cursor.executemany(query, chunk)
+                    connection.commit()
+                    inserted += cursor.rowcount
+            finally:
+                cursor.close()
+        return inserted
+
+
+class MySQLBackend(Backend):
+    """user_data in MySQL, through the process-wide ConnectionPool."""
+
+    name = "mysql"
+
+    def __init__(self):
+        if mysql is None:
+            raise ImportError(
+                "MySQLBackend needs mysql-connector-python: "
+                "pip install mysql-connector-python")
+
+    def connection(self):
+        return pooled_connection()
+
+    def cursor(self, connection, dictionary=False):
+        return connection.cursor(dictionary=dictionary)
+
+    def variance_sql(self, column):
+        return f"VAR_POP({column})"
+
+    def _abandon(self, connection, cursor):
+        # Closing would drain the unread rows; the pool drops the
+        # connection instead
+        if not connection.unread_result:
+            cursor.close()
+
+    def create_schema(self):
+        connection = connect_db()
+        create_database(connection)
+        connection.close()
+        with self.connection() as connection:
+            create_table(connection)
+            create_email_index(connection)
+            create_age_index(connection)
+
+
+class SQLiteBackend(Backend):
+    """user_data in a SQLite file (PRODEV_SQLITE_PATH, default ALX_prodev.db)."""
+
+    name = "sqlite"
+    insert_verb = "INSERT OR IGNORE"
+
+    def __init__(self, path=None):
+        self.path = path or os.environ.get("PRODEV_SQLITE_PATH",
+                                           f"{DB_NAME}.db")
+
+    @contextmanager
+    def connection(self):
+        connection = sqlite3.connect(self.path)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def cursor(self, connection, dictionary=False):
+        cursor = connection.cursor()
+        if dictionary:
+            cursor.row_factory = _dict_row
+        return cursor
+
+    def sql(self, query):
+        return query.replace("%s", "?")
+
+    def create_schema(self):
+        with self.connection() as connection:
+            connection.executescript("""
+                CREATE TABLE IF NOT EXISTS user_data (
+                    user_id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    email TEXT NOT NULL UNIQUE,
+                    age NUMERIC NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_user_data_age ON user_data (age);
+            """)
+
+
+BACKENDS = {"mysql": MySQLBackend, "sqlite": SQLiteBackend}
+
+_backend = None
+
+
+def use_backend(backend):
+    """
+    Select the backend every generator runs against. Accepts a Backend
+    instance or a name from BACKENDS.
+    """
+    global _backend
+    if isinstance(backend, str):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        backend = BACKENDS[backend]()
+    _backend = backend
+    return _backend
+
+
+def get_backend():
+    """Return the selected backend (PRODEV_BACKEND, default mysql)."""
+    if _backend is None:
+        return use_backend(os.environ.get("PRODEV_BACKEND", "mysql"))
+    return _backend